@@ -0,0 +1,201 @@
+"""
+Activity Model
+Commit-time and commit-type distributions fitted from a repository's history
+"""
+
+import re
+import hashlib
+import subprocess
+
+import numpy as np
+
+from history_index import HistoryIndex, CHUNK_LINES, load_by_head
+from schedule import weekdays
+
+# One cache per commit-type list, so the days and year bots do not evict each other's
+CACHE_NAME = "backfill_activity_model_{types}.npz"
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def cache_name(types):
+    """Cache file name for models fitted for this list of commit types"""
+    digest = hashlib.blake2b("\n".join(types).encode('utf-8'), digest_size=6).hexdigest()
+    return CACHE_NAME.format(types=digest)
+
+
+def stem(word):
+    """Crude stem so "fixes", "fixed" and "fix" (or "updates" and "update") compare equal"""
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 3 else word
+
+
+def words(text):
+    """Set of stemmed lowercase words in a text"""
+    return {stem(word) for word in WORD.findall(text.lower())}
+
+
+class TypeClassifier:
+    """Maps commit subjects to the closest of a list of commit types
+
+    A subject goes to the type sharing the most words with it ("Fixed typo
+    in docs" -> "Fix typo"), the earlier listed type on a tie, so a bare
+    "fix ..." counts as the first fix type. Subjects sharing no word with
+    any type are not counted.
+    """
+
+    def __init__(self, types):
+        self.types = list(types)
+        self.index = {}
+        for number, commit_type in enumerate(self.types):
+            for word in words(commit_type):
+                self.index.setdefault(word, []).append(number)
+
+    def __call__(self, subject):
+        """Index of the closest type, or -1"""
+        shared = {}
+        for word in words(subject):
+            for number in self.index.get(word, ()):
+                shared[number] = shared.get(number, 0) + 1
+        if not shared:
+            return -1
+        return max(shared, key=lambda number: (shared[number], -number))
+
+
+class ActivityModel:
+    """Histograms of when and what a repository's authors commit
+
+    Per-day commit counts (a HistoryIndex), commits per hour of the day in
+    the author's own time zone, and commits per commit type. Weekday and
+    commits-per-day histograms are derived from the day counts. The model
+    is cached in the git directory by HEAD, one file per list of commit
+    types; when HEAD moves forward only the new commits are read.
+    """
+
+    def __init__(self, types, head=None, days=None, hours=None, type_counts=None):
+        self.types = list(types)
+        self.head = head
+        self.days = days if days is not None else HistoryIndex()
+        self.hours = hours if hours is not None else np.zeros(24, dtype=np.int64)
+        self.type_counts = type_counts if type_counts is not None else np.zeros(len(self.types), dtype=np.int64)
+
+    @property
+    def total(self):
+        """Number of commits fitted"""
+        return self.days.total
+
+    def weekday_counts(self):
+        """Commits per weekday, Monday first"""
+        if self.days.origin is None:
+            return np.zeros(7, dtype=np.int64)
+        span = self.days.origin + np.arange(len(self.days.counts))
+        return np.bincount(weekdays(span), weights=self.days.counts, minlength=7).astype(np.int64)
+
+    def weekday_activity(self):
+        """Fraction of each weekday with at least one commit, over the fitted span"""
+        if self.days.origin is None:
+            return np.zeros(7)
+        span = weekdays(self.days.origin + np.arange(len(self.days.counts)))
+        active = np.bincount(span, weights=self.days.counts > 0, minlength=7)
+        return active / np.maximum(np.bincount(span, minlength=7), 1)
+
+    def per_day_counts(self):
+        """How many active days had 0, 1, 2, ... commits (index 0 is always 0)"""
+        return np.bincount(self.days.counts[self.days.counts > 0], minlength=1)
+
+    def type_weights(self):
+        """Relative frequency of each commit type, uniform when no subject matched"""
+        if not self.type_counts.any():
+            return np.ones(len(self.types)) / len(self.types)
+        return self.type_counts / self.type_counts.sum()
+
+    def sample_day_counts(self, rng, days):
+        """Commit counts for a datetime64[D] array: days are active at their weekday's rate"""
+        per_day = self.per_day_counts()
+        counts = rng.choice(len(per_day), size=len(days), p=per_day / per_day.sum())
+        active = rng.random(len(days)) < self.weekday_activity()[weekdays(days)]
+        return np.where(active, counts, 0)
+
+    def sample_hours(self, rng, size):
+        """Commit hours drawn from the hour-of-day histogram"""
+        return rng.choice(24, size=size, p=self.hours / self.hours.sum())
+
+    def sample_types(self, days, seed=None):
+        """Commit types for a plan's day column, drawn in one go from the type frequencies
+
+        The commits of one day get different types while there are types
+        left (weighted sampling without replacement), because two commits
+        of the same type on the same day would render the same file.
+        """
+        if len(days) == 0:
+            return []
+        rng = np.random.default_rng(seed)
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(days)]))
+        # Efraimidis-Spirakis: ordering by -log(u) / weight gives a weighted sample without
+        # replacement; never-seen types keep a tiny weight so busy days still get distinct ones
+        weights = np.maximum(self.type_weights(), 1e-9)
+        order = np.argsort(-np.log(rng.random((len(starts), len(self.types)))) / weights, axis=1)
+        rank = (np.arange(len(days)) - starts[group]) % len(self.types)
+        return [self.types[number] for number in order[group, rank].tolist()]
+
+    def summary(self):
+        """One line describing the fitted histograms"""
+        typed = int(self.type_counts.sum())
+        busiest = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")[int(np.argmax(self.weekday_counts()))]
+        return (f"{self.total} commits on {self.days.active_days} days, "
+                f"usually {int(np.argmax(self.per_day_counts()))} per active day, "
+                f"peak hour {int(np.argmax(self.hours)):02d}:00, busiest on {busiest}, "
+                f"{typed / max(self.total, 1):.0%} of subjects typed")
+
+    def scan(self, repo_path, revisions):
+        """Stream `git log` over revisions into the histograms"""
+        classify = TypeClassifier(self.types)
+        process = subprocess.Popen(
+            ['git', 'log', '--format=%ad %s', '--date=format:%Y-%m-%d %H'] + revisions,
+            cwd=repo_path, stdout=subprocess.PIPE, text=True, errors='replace')
+        chunk = []
+        for line in process.stdout:
+            chunk.append(line)
+            if len(chunk) >= CHUNK_LINES:
+                self.add_lines(chunk, classify)
+                chunk = []
+        self.add_lines(chunk, classify)
+        process.stdout.close()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, 'git log')
+
+    def add_lines(self, lines, classify):
+        """Count a chunk of "YYYY-MM-DD HH subject" log lines"""
+        if not lines:
+            return
+        self.days.add_days(np.array([line[:10] for line in lines], dtype='datetime64[D]'))
+        self.hours += np.bincount(np.array([int(line[11:13]) for line in lines]), minlength=24)
+        picks = np.array([classify(line[14:]) for line in lines])
+        self.type_counts += np.bincount(picks[picks >= 0], minlength=len(self.types))
+
+    def save(self, path):
+        """Write the model to an .npz cache file"""
+        np.savez(path, head=np.array(self.head or ''), types=np.array(self.types),
+                 origin=np.array(self.days.origin if self.days.origin is not None else 'NaT',
+                                 dtype='datetime64[D]'),
+                 counts=self.days.counts, hours=self.hours, type_counts=self.type_counts)
+
+    @classmethod
+    def read(cls, path, types):
+        """Read a model written by save(); fitted for other types it is unusable"""
+        with np.load(path) as data:
+            if data['types'].tolist() != list(types):
+                raise ValueError(f"{path} was fitted for other commit types")
+            origin = data['origin'][()]
+            days = HistoryIndex(origin=None if np.isnat(origin) else origin, counts=data['counts'])
+            return cls(types, head=str(data['head']) or None, days=days,
+                       hours=data['hours'], type_counts=data['type_counts'])
+
+    @classmethod
+    def load(cls, repo_path, types, save=True):
+        """Return the model of repo_path's history up to HEAD, reusing and extending the cached one"""
+        return load_by_head(repo_path, cache_name(types), lambda path: cls.read(path, types),
+                            lambda: cls(types), save=save)
@@ -0,0 +1,544 @@
+"""
+Backfill Bot Base
+Planning-independent machinery shared by the days and the year backfill bots
+"""
+
+import os
+import time
+import random
+import datetime
+
+# Only light modules here: the rest is imported where it is used, so --help and --dry-run stay cheap
+from rate_limiter import RateLimiter
+
+DEFAULT_REPO_PATH = "/Users/shivamsahu/Documents/Projects/github-contribution-bot"
+
+def format_per_day(commits_per_day):
+    """A fixed commit count as is, a (low, high) range as low-high"""
+    if isinstance(commits_per_day, (tuple, list)):
+        return "-".join(str(count) for count in commits_per_day)
+    return str(commits_per_day)
+
+class BackfillBot:
+    """Commits a planned schedule through a commit backend, then pushes and reports
+
+    Subclasses set bot (the label used in logs, metrics and plan files) and
+    templates, plan their own schedule and print their own progress through
+    show_day() and show_commit().
+    """
+    bot = None
+    templates = None
+    # Print a line for every commit created
+    announce_commits = False
+
+    def __init__(self, repo_path=DEFAULT_REPO_PATH, backend="worktree", commit_rate=None, push_rate=0.5,
+                 seed=None, resume=True, journal_path=None, fill_gaps=True,
+                 render_workers=0, push=True, push_every_commits=None, push_every_mb=None,
+                 layout="flat", rolling_files=None, timing=False, timing_path=None,
+                 metrics_path=None, metrics_port=None, log_dir=None, blob_cache=True,
+                 maintenance_threshold=None, realism_repo=None, save_caches=True):
+        self.repo_path = repo_path
+        # GitHub token should be set via environment variable or config file
+        self.github_token = os.getenv("GITHUB_TOKEN", "")
+        # Commit backend: "worktree" (git add + git commit), "fast-import", "bare",
+        # "pack" or "sharded" (months built in parallel processes)
+        self.backend = backend
+        self.commit_backend = None
+        # Commits are local so they are unlimited by default; pushes hit the remote
+        self.commit_limiter = RateLimiter(commit_rate)
+        self.push_limiter = RateLimiter(push_rate)
+        # One seed drives both the schedule and the commit type picks
+        self.seed = seed
+        self.random = random.Random(seed)
+        # Completed plan entries are journaled so an interrupted run can resume
+        self.resume = resume
+        self.journal_path = journal_path
+        self.journal = None
+        # Treat commits_per_day as a target and only fill days below it
+        self.fill_gaps = fill_gaps
+        # Draw commit days, counts, hours and types from this repository's history instead
+        self.realism_repo = realism_repo
+        self.activity_model = None
+        # Threads rendering commit content ahead of the git writer (0 = inline)
+        self.render_workers = render_workers
+        # Keep the history index and activity model caches in the git directory (off for dry runs)
+        self.save_caches = save_caches
+        # Identical content is shipped once: content hash -> blob id, kept in the git directory
+        self.cache_blobs = blob_cache
+        self.blob_cache = None
+        from layouts import get_layout, RollingFilePool
+        from timing import PhaseTimer, NULL_TIMER
+        from metrics import BackfillMetrics
+        # Where generated files go: "flat", "date" (dir/YYYY/MM/) or "hashed" (dir/xx/)
+        self.layout = get_layout(layout)
+        # Rewrite a fixed pool of this many files instead of adding a file per commit
+        # (pool files have their own paths, so the layout would be silently ignored)
+        if rolling_files and layout != "flat":
+            raise ValueError(f"rolling_files replaces every file path, so layout must be flat, not {layout}")
+        self.file_pool = RollingFilePool(rolling_files) if rolling_files else None
+        # Push to origin main once the history is written, optionally in batches
+        self.push = push
+        self.push_every_commits = push_every_commits
+        self.push_every_mb = push_every_mb
+        # Repack with bitmaps and write a commit-graph once this many commits piled up
+        # (None = maintenance.DEFAULT_THRESHOLD, 0 = never)
+        self.maintenance_threshold = maintenance_threshold
+        # Per-phase duration histograms, printed at the end and optionally saved as JSON
+        self.timer = PhaseTimer() if timing or timing_path else NULL_TIMER
+        self.timing_path = timing_path
+        # Prometheus metrics: a textfile-collector file and/or a local /metrics port
+        self.metrics = BackfillMetrics(metrics_path, metrics_port,
+                                       labels={"bot": self.bot, "repo": os.path.basename(os.path.abspath(repo_path))})
+        # JSON records go to bot.log / bot_error.log through a background thread, in log_dir
+        # or by default the repository's git directory (False = off, and logging is never loaded)
+        self.logger = None
+        if log_dir is not False:
+            from bot_logging import configure_logging
+            self.logger = configure_logging(log_dir or self.git_dir())
+        
+    def log(self, event, failed=False, exc_info=None, **fields):
+        """Log one structured event (see bot_logging.log_event), at ERROR level if failed"""
+        if self.logger is None:
+            return
+        import logging
+        from bot_logging import log_event
+        log_event(self.logger, event, logging.ERROR if failed else logging.INFO, exc_info=exc_info, **fields)
+    
+    def generate_commit_content(self, date, commit_type=None):
+        """Generate realistic commit content for a specific date"""
+        if commit_type is None:
+            commit_type = self.random.choice(self.templates.types)
+        with self.timer.phase("render"):
+            commit_data = self.templates.render(commit_type, date)
+            day = date.date() if isinstance(date, datetime.datetime) else date
+            commit_data["file"] = self.layout(commit_data["file"], day)
+        return commit_data
+    
+    def get_backend(self):
+        """Return the commit backend, creating it on first use"""
+        if self.commit_backend is None:
+            from git_backend import create_backend
+            self.commit_backend = create_backend(self.backend, self.repo_path)
+            self.commit_backend.timer = self.timer
+            # Only backends shipping content (fast-import, sharded) have a cache to use
+            if self.cache_blobs and hasattr(self.commit_backend, "blob_cache"):
+                if self.blob_cache is None:
+                    from blob_cache import BlobCache
+                    self.blob_cache = BlobCache.load(self.repo_path)
+                self.commit_backend.blob_cache = self.blob_cache
+        return self.commit_backend
+    
+    def finish_backend(self):
+        """Flush commits still buffered in the commit backend"""
+        import subprocess
+        if self.commit_backend is None:
+            return True
+        try:
+            start = time.perf_counter()
+            try:
+                with self.timer.phase("close"):
+                    ok = self.commit_backend.close()
+            except subprocess.CalledProcessError as e:
+                # update-ref (or a shard worker's git) failed: nothing new is on the branch
+                print(f"❌ Error closing commit backend: {e}")
+                self.log("backend close failed", failed=True, phase="close",
+                         backend=self.backend, error=str(e), stderr=e.stderr,
+                         duration=round(time.perf_counter() - start, 6))
+                ok = False
+            except Exception as e:
+                # e.g. BrokenPipeError from a fast-import that died, or a shard worker's exception
+                print(f"❌ Unexpected error closing commit backend: {e}")
+                self.log("backend close failed", failed=True, exc_info=True,
+                         phase="close", backend=self.backend, error=repr(e),
+                         duration=round(time.perf_counter() - start, 6))
+                ok = False
+            else:
+                self.log("backend closed", failed=not ok,
+                         phase="close", backend=self.backend, ok=ok,
+                         duration=round(time.perf_counter() - start, 6))
+            if self.journal is not None:
+                if ok:
+                    self.journal.confirm(self.commit_backend.resolve)
+                else:
+                    self.journal.discard()
+            if self.blob_cache is not None:
+                if ok:
+                    self.blob_cache.confirm()
+                else:
+                    self.blob_cache.discard()
+            return ok
+        finally:
+            self.commit_backend = None
+    
+    def git_dir(self):
+        """The repository's git directory, where the bot keeps its state and logs"""
+        from git_backend import git_dir
+        return git_dir(self.repo_path)
+    
+    def journal_file(self):
+        """Path of the checkpoint journal (kept in the git directory by default)"""
+        if self.journal_path is not None:
+            return self.journal_path
+        return os.path.join(self.git_dir(), 'backfill_journal.jsonl')
+    
+    def done_plan_ids(self):
+        """Plan ids the checkpoint journal holds, read without opening it (None when not resuming)"""
+        if not self.resume:
+            return None
+        from journal import CheckpointJournal
+        return set(CheckpointJournal.read(self.journal_file()))
+    
+    def open_journal(self):
+        """Open the checkpoint journal"""
+        if not self.resume:
+            return None
+        from journal import CheckpointJournal
+        self.journal = CheckpointJournal(self.journal_file())
+        if len(self.journal):
+            print(f"♻️  Resuming: {len(self.journal)} planned commits already done")
+        return self.journal
+    
+    def render_pipeline(self, plan):
+        """Pipeline rendering the not-yet-done plan entries ahead of the writer
+
+        Commit types are drawn here, in plan order, so seeded runs stay
+        reproducible no matter which worker renders what.
+        """
+        from pipeline import RenderPipeline
+        from schedule import iter_plan
+        pipeline = RenderPipeline(self.render_entry, workers=self.render_workers)
+        types = self.plan_commit_types(plan)
+        entries = ((commit_datetime, slot, plan_id,
+                    types[number] if types is not None else self.random.choice(self.templates.types))
+                   for number, (commit_datetime, slot, plan_id) in enumerate(iter_plan(plan))
+                   if self.journal is None or plan_id not in self.journal)
+        return pipeline, pipeline.run(entries)
+    
+    def render_entry(self, entry):
+        """Render one plan entry for the pipeline, returning a render error instead of raising it
+
+        The writer re-raises it in create_backfill_commit, so a commit that
+        fails to render is one failed commit, not an aborted run.
+        """
+        try:
+            return self.generate_commit_content(entry[0], entry[3])
+        except Exception as e:
+            return e
+    
+    def load_activity_model(self):
+        """Fit the activity model of realism_repo, cached by its HEAD (None when not set)"""
+        if not self.realism_repo:
+            return None
+        from activity_model import ActivityModel
+        model = ActivityModel.load(self.realism_repo, self.templates.types, save=self.save_caches)
+        if not model.total:
+            print(f"⚠️  {self.realism_repo} has no commits to learn from, using the fixed schedule")
+            return None
+        print(f"🎭 Activity model: {model.summary()}")
+        self.activity_model = model
+        return model
+    
+    def plan_commit_types(self, plan):
+        """Commit types of every plan entry drawn in one go from the activity model (None without one)"""
+        if self.activity_model is None:
+            return None
+        return self.activity_model.sample_types(plan["day"], seed=self.random.getrandbits(64))
+    
+    def load_history(self):
+        """Index the commits already in the repository (None when fill_gaps is off)"""
+        if not self.fill_gaps:
+            return None
+        from history_index import HistoryIndex
+        history = HistoryIndex.load(self.repo_path, save=self.save_caches)
+        print(f"📚 Existing history: {history.total} commits on {history.active_days} days")
+        return history
+    
+    def push_history(self):
+        """Push the commits origin does not have yet, in batches when configured"""
+        from push_strategy import BatchedPusher
+        every_bytes = int(self.push_every_mb * 1024 * 1024) if self.push_every_mb else None
+        pusher = BatchedPusher(self.repo_path, every_commits=self.push_every_commits,
+                               every_bytes=every_bytes, limiter=self.push_limiter)
+        ok = pusher.push()
+        for push in pusher.pushes:
+            self.timer.record("push", push["seconds"])
+            self.metrics.observe_push(push["ok"], push["seconds"], push["bytes"])
+            self.log("push", failed=not push["ok"],
+                     phase="push", commit=push["commit"], commits=push["commits"],
+                     bytes=push["bytes"], duration=round(push["seconds"], 6), error=push["error"])
+        if pusher.pushes:
+            print(f"📦 Pushes: {pusher.summary()}")
+        return ok
+    
+    def run_maintenance(self):
+        """Write a commit-graph and bitmaps when enough commits were added since the last time"""
+        if self.maintenance_threshold == 0:
+            return False
+        import subprocess
+        from maintenance import DEFAULT_THRESHOLD, RepositoryMaintenance
+        maintenance = RepositoryMaintenance(self.repo_path, self.maintenance_threshold or DEFAULT_THRESHOLD)
+        start = time.perf_counter()
+        try:
+            with self.timer.phase("maintenance"):
+                ran = maintenance.run()
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️  Repository maintenance failed: {e}")
+            self.log("maintenance failed", failed=True, phase="maintenance",
+                     error=str(e), stderr=e.stderr, duration=round(time.perf_counter() - start, 6))
+            return False
+        lines = maintenance.summary()
+        print(f"🧹 Maintenance: {lines[0]}")
+        for line in lines[1:]:
+            print(f"   {line}")
+        if ran:
+            self.log("maintenance finished", phase="maintenance", commits=maintenance.pending,
+                     duration=round(time.perf_counter() - start, 6),
+                     speedups={name: [round(before, 6), round(after, 6)]
+                               for name, (before, after) in maintenance.speedups().items()})
+        return ran
+    
+    def report_timings(self):
+        """Print the per-phase timing table and save it when asked to"""
+        if not self.timer.enabled:
+            return
+        print("⏱️  Phase timings:")
+        print(self.timer.summary())
+        if self.timing_path:
+            self.timer.export(self.timing_path)
+            print(f"📄 Phase timings written to {self.timing_path}")
+    
+    def checkpoint(self, plan_id):
+        """Journal a planned commit that was just created"""
+        if self.journal is not None:
+            backend = self.get_backend()
+            self.journal.record(plan_id, backend.last_commit, durable=backend.durable)
+    
+    def finalize_commit(self, commit_data, target_date):
+        """Resolve the rolling-pool file and the message of rendered content (once)"""
+        if "message" not in commit_data:
+            # Pool files are handed out in commit order, so only in the writer or the plan compiler
+            if self.file_pool is not None:
+                commit_data["file"] = self.file_pool(commit_data["file"], target_date.date())
+            commit_data["message"] = f"{commit_data['type']} - {target_date.strftime('%Y-%m-%d %H:%M')}"
+        return commit_data
+    
+    def create_backfill_commit(self, target_date, commit_data=None, plan_id=None):
+        """Create a commit with a specific past date"""
+        import subprocess
+        start = time.perf_counter()
+        try:
+            # Generate commit content (unless the render pipeline already did)
+            if commit_data is None:
+                commit_data = self.generate_commit_content(target_date)
+            elif isinstance(commit_data, Exception):
+                raise commit_data
+            
+            # Create commit with specific date
+            commit_message = self.finalize_commit(commit_data, target_date)["message"]
+            
+            with self.timer.phase("commit"):
+                created = self.get_backend().commit(commit_data["file"], commit_data["content"],
+                                                    commit_message, target_date)
+            if not created:
+                self.log("commit skipped", phase="commit", plan_id=plan_id,
+                         date=target_date, file=commit_data["file"], reason="unchanged")
+                return False
+            
+            self.log("commit created", phase="commit", plan_id=plan_id,
+                     date=target_date, file=commit_data["file"], backend=self.backend,
+                     duration=round(time.perf_counter() - start, 6))
+            if self.announce_commits:
+                print(f"✅ Created backfill commit: {commit_message}")
+            return True
+            
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Error creating backfill commit: {e}")
+            self.log("commit failed", failed=True, phase="commit", plan_id=plan_id,
+                     date=target_date, backend=self.backend, error=str(e),
+                     stderr=e.stderr, duration=round(time.perf_counter() - start, 6))
+            return False
+        except Exception as e:
+            print(f"❌ Unexpected error: {e}")
+            self.log("commit failed", failed=True, exc_info=True, phase="commit",
+                     plan_id=plan_id, date=target_date, backend=self.backend, error=repr(e),
+                     duration=round(time.perf_counter() - start, 6))
+            return False
+    
+    def finish_run(self, planned, created, skipped, pipeline=None):
+        """Write out the history, push it and report, returning counts of what was done"""
+        # Streaming backends only write history once the stream is closed
+        backend_ok = self.finish_backend()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        result = {
+            "planned": planned,
+            "created": created,
+            "skipped": skipped,
+            "written": backend_ok,
+            "pushed": False,
+        }
+        if not backend_ok:
+            print(f"❌ Commit backend '{self.backend}' failed to write history, skipping push")
+            self.metrics.finish()
+            self.metrics.close()
+            self.log("backfill finished", failed=True, bot=self.bot,
+                     repo=self.repo_path, **result)
+            self.report_timings()
+            return result
+        
+        print(f"⏱️  Commit rate: {self.commit_limiter.summary()}")
+        if self.blob_cache is not None:
+            print(f"🧊 Blob cache: {self.blob_cache.summary()}")
+        if pipeline is not None:
+            print(f"🧵 Pipeline: {pipeline.summary()}")
+        
+        # Before the push, so it already counts objects from the bitmap
+        self.run_maintenance()
+        
+        # Push all commits
+        if self.push:
+            print("\n🚀 Pushing all commits to GitHub...")
+            if self.push_history():
+                print("✅ All commits pushed successfully!")
+                result["pushed"] = True
+            else:
+                print("You may need to push manually: git push origin main")
+        self.metrics.finish()
+        self.metrics.close()
+        self.log("backfill finished", bot=self.bot, repo=self.repo_path, **result)
+        self.report_timings()
+        return result
+    
+    def show_day(self, day, day_number, done, total):
+        """Progress output as the commits of a new day start (done of total plan entries processed)"""
+    
+    def show_commit(self, commit_datetime, slot, commits_per_day):
+        """Progress output before each planned commit"""
+    
+    def run_plan(self, plan, commits_per_day):
+        """Commit every not-yet-done entry of a plan, returning (created, skipped, pipeline)"""
+        successful_commits = 0
+        current_day = None
+        day_number = 0
+        self.open_journal()
+        if self.file_pool is not None:
+            self.file_pool.load(self.repo_path)
+        pipeline, rendered = self.render_pipeline(plan)
+        self.metrics.start(len(plan))
+        self.log("backfill started", bot=self.bot, repo=self.repo_path,
+                 backend=self.backend, planned=len(plan), commits_per_day=commits_per_day)
+        
+        try:
+            for done, ((commit_datetime, slot, plan_id, _), commit_data) in enumerate(rendered):
+                if commit_datetime.date() != current_day:
+                    current_day = commit_datetime.date()
+                    self.show_day(current_day, day_number, done, len(plan))
+                    day_number += 1
+                self.show_commit(commit_datetime, slot, commits_per_day)
+                
+                # Pace commits (unlimited unless commit_rate is set)
+                self.commit_limiter.acquire()
+                
+                start = time.perf_counter()
+                created = self.create_backfill_commit(commit_datetime, commit_data, plan_id)
+                self.metrics.observe_commit(created, time.perf_counter() - start)
+                if created:
+                    successful_commits += 1
+                    self.checkpoint(plan_id)
+        except BaseException:
+            # Interrupted (or the plan itself failed): still write out and journal what was committed
+            self.finish_backend()
+            raise
+        
+        # Plan entries the journal marked as done never reach the pipeline
+        return successful_commits, len(plan) - pipeline.items, pipeline
+    
+    def compile_plan(self, plan, path, commits_per_day=None):
+        """Write every planned commit, fully resolved, to a plan file for execute_plan()
+
+        Commit types, file paths (layout and rolling pool included) and
+        messages are all decided here, in plan order, so executing the file
+        later replays exactly this history. Only the git blob id of each
+        content is stored; execute_plan() renders the content again from the
+        type and date and checks it against that id. commits_per_day only goes
+        into the header, for execute_plan()'s progress output.
+        """
+        from plan_file import PlanWriter
+        from schedule import iter_plan
+        from git_backend import blob_id
+        if self.file_pool is not None:
+            self.file_pool.load(self.repo_path)
+        with PlanWriter(path, len(plan), bot=self.bot, seed=self.seed,
+                        commits_per_day=commits_per_day) as writer:
+            types = self.plan_commit_types(plan)
+            for number, (commit_datetime, _, plan_id) in enumerate(iter_plan(plan)):
+                commit_data = self.generate_commit_content(commit_datetime, types[number] if types else None)
+                commit_data = self.finalize_commit(commit_data, commit_datetime)
+                writer.write(plan_id, commit_datetime, commit_data["type"], commit_data["file"],
+                             commit_data["message"], blob_id(commit_data["content"].encode('utf-8')))
+        print(f"📝 Compiled {writer.count} planned commits into {path}")
+        return writer.count
+    
+    def execute_plan(self, path):
+        """Stream a plan file from compile_plan() into the commit backend, returning counts of what was done"""
+        from plan_file import PlanReader
+        from git_backend import blob_id
+        reader = PlanReader(path)
+        if reader.header.get("bot") != self.bot:
+            raise ValueError(f"{path} was compiled by the {reader.header.get('bot')} bot, not the {self.bot} bot")
+        print(f"▶️  Executing {len(reader)} planned commits from {path}")
+        print("=" * 60)
+        
+        successful_commits = 0
+        skipped_commits = 0
+        processed = 0
+        current_day = None
+        day_number = 0
+        self.open_journal()
+        self.metrics.start(len(reader))
+        self.log("plan execution started", bot=self.bot, repo=self.repo_path,
+                 backend=self.backend, plan=path, planned=len(reader))
+        
+        # Plans compiled before the header kept it have no commits per day to show
+        commits_per_day = reader.header.get("commits_per_day") or "?"
+        try:
+            for plan_id, commit_datetime, commit_type, file_path, message, content_hash in reader:
+                processed += 1
+                if self.journal is not None and plan_id in self.journal:
+                    skipped_commits += 1
+                    continue
+                if commit_datetime.date() != current_day:
+                    current_day = commit_datetime.date()
+                    self.show_day(current_day, day_number, processed - 1, len(reader))
+                    day_number += 1
+                self.show_commit(commit_datetime, int(plan_id.partition("#")[2]), commits_per_day)
+                
+                content = self.templates.render(commit_type, commit_datetime)["content"]
+                if blob_id(content.encode('utf-8')) != content_hash:
+                    # The templates changed since the plan was compiled
+                    print(f"❌ {plan_id}: content does not match the compiled plan, skipping")
+                    self.log("commit failed", failed=True, phase="commit", plan_id=plan_id,
+                             date=commit_datetime, file=file_path, error="content hash mismatch")
+                    self.metrics.observe_commit(False, 0.0)
+                    continue
+                
+                # Pace commits (unlimited unless commit_rate is set)
+                self.commit_limiter.acquire()
+                
+                start = time.perf_counter()
+                commit_data = {"type": commit_type, "file": file_path, "content": content, "message": message}
+                created = self.create_backfill_commit(commit_datetime, commit_data, plan_id)
+                self.metrics.observe_commit(created, time.perf_counter() - start)
+                if created:
+                    successful_commits += 1
+                    self.checkpoint(plan_id)
+        except BaseException:
+            # Interrupted (or the plan itself failed): still write out and journal what was committed
+            self.finish_backend()
+            raise
+        
+        print(f"\n🎉 Plan executed! Created {successful_commits} commits")
+        if skipped_commits:
+            print(f"♻️  Skipped {skipped_commits} commits already done in a previous run")
+        return self.finish_run(len(reader), successful_commits, skipped_commits)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Commit Backend Benchmark
+Runs backfill_past_days against throwaway repositories for every backend and
+schedule size, measuring commits/sec, peak RSS and the resulting .git size
+
+Each case runs in a fresh child process so peak RSS is per case. Results are
+written as JSON; pass --compare with an earlier results file to see the
+change in throughput per case.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from git_backend import BACKENDS
+from bench_layout import IDENTITY, git
+from bench_rolling import directory_size
+
+SCHEDULES = {"30d": 30, "1y": 365, "5y": 5 * 365}
+
+
+def peak_rss_kib(who):
+    """Peak resident set size in KiB (ru_maxrss is bytes on macOS, KiB on Linux)"""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(backend, days, commits_per_day):
+    """Child process: backfill one throwaway repository and report measurements"""
+    from backfill_bot import GitHubBackfillBot
+
+    work_dir = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        git(work_dir, 'init', '-q', '-b', 'main')
+        git(work_dir, 'commit', '-q', '--allow-empty', '-m', 'Initial commit')
+        # No maintenance: its repack would be timed and change the .git size of long schedules only
+        bot = GitHubBackfillBot(repo_path=work_dir, backend=backend, seed=0, push=False, log_dir=False,
+                                maintenance_threshold=0)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = bot.backfill_past_days(days, commits_per_day)
+        seconds = time.perf_counter() - start
+        return {
+            "backend": backend,
+            "days": days,
+            "commits_per_day": commits_per_day,
+            "commits": result["created"],
+            "written": result["written"],
+            "seconds": round(seconds, 3),
+            "commits_per_sec": round(result["created"] / seconds, 1) if seconds else None,
+            # Largest of the bot itself and the git processes it ran
+            "peak_rss_kib": max(peak_rss_kib(resource.RUSAGE_SELF),
+                                peak_rss_kib(resource.RUSAGE_CHILDREN)),
+            "git_dir_bytes": directory_size(os.path.join(work_dir, '.git')),
+        }
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def spawn_case(backend, days, commits_per_day):
+    """Run one case in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--case", backend, str(days), str(commits_per_day)],
+        capture_output=True, text=True, env=dict(os.environ, **IDENTITY))
+    if output.returncode != 0:
+        return {"backend": backend, "days": days, "commits_per_day": commits_per_day,
+                "error": output.stderr.strip().splitlines()[-1] if output.stderr.strip() else "failed"}
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def environment():
+    """Where and on what code the benchmark ran"""
+    revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    return {
+        "revision": revision or None,
+        "python": platform.python_version(),
+        "git": git(ROOT, '--version').strip(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline_path):
+    """Print throughput change against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(case["backend"], case["days"], case["commits_per_day"]): case
+                    for case in json.load(f)["results"] if "error" not in case}
+    print(f"\n📊 Compared with {baseline_path}")
+    for case in results:
+        before = baseline.get((case["backend"], case["days"], case["commits_per_day"]))
+        if before is None or "error" in case:
+            continue
+        change = case["commits_per_sec"] / before["commits_per_sec"] - 1
+        print(f"{case['backend']:<12} {case['days']:>5}d  {before['commits_per_sec']:>8,.1f}/s -> "
+              f"{case['commits_per_sec']:>8,.1f}/s  ({change:+.0%})")
+
+
+def main():
+    """Run every backend across every schedule size"""
+    parser = argparse.ArgumentParser(description="Benchmark commit backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--schedules", nargs="+", default=list(SCHEDULES), choices=list(SCHEDULES))
+    parser.add_argument("--commits-per-day", type=int, default=2)
+    parser.add_argument("--output", default="bench_backends.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--case", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        backend, days, commits_per_day = args.case
+        print(json.dumps(run_case(backend, int(days), int(commits_per_day))))
+        return
+
+    print(f"🏁 Backend benchmark: {', '.join(args.backends)} over {', '.join(args.schedules)}")
+    print("=" * 60)
+    results = []
+    for schedule in args.schedules:
+        for backend in args.backends:
+            case = spawn_case(backend, SCHEDULES[schedule], args.commits_per_day)
+            case["schedule"] = schedule
+            results.append(case)
+            if "error" in case:
+                print(f"{backend:<12} {schedule:>3}  ❌ {case['error']}")
+                continue
+            print(f"{backend:<12} {schedule:>3}  {case['commits']:>5} commits  "
+                  f"{case['commits_per_sec']:>8,.1f}/s  peak rss: {case['peak_rss_kib'] / 1024:>6.1f} MiB  "
+                  f".git: {case['git_dir_bytes'] / 1024:>8,.0f} KiB")
+
+    with open(args.output, 'w') as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Repository Layout Benchmark
+Compares commit and checkout time of the flat layout with the sharded ones
+once the history holds 10k+ generated files
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import datetime
+import subprocess
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from git_backend import create_backend
+from layouts import LAYOUTS
+from year_backfill import TEMPLATES
+
+IDENTITY = {"GIT_AUTHOR_NAME": "Bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+            "GIT_COMMITTER_NAME": "Bench", "GIT_COMMITTER_EMAIL": "bench@example.com"}
+
+
+def git(repo_path, *args):
+    """Run git quietly in repo_path"""
+    return subprocess.run(['git'] + list(args), cwd=repo_path, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def commit_plan(commits, per_day=None):
+    """Cycle through the template types, per_day commits a day (default: one of each)"""
+    start = datetime.datetime(2015, 1, 1, 9)
+    types = TEMPLATES.types
+    per_day = per_day or len(types)
+    for i in range(commits):
+        day = start + datetime.timedelta(days=i // per_day, minutes=i % per_day)
+        yield types[i % len(types)], day
+
+
+def build_history(repo_path, allocate, backend, commits, per_day=None):
+    """Write the benchmark history and return the seconds spent committing"""
+    git(repo_path, 'init', '-q', '-b', 'main')
+    writer = create_backend(backend, repo_path)
+    start = time.perf_counter()
+    for commit_type, day in commit_plan(commits, per_day):
+        commit_data = TEMPLATES.render(commit_type, day)
+        path = allocate(commit_data["file"], day.date())
+        writer.commit(path, commit_data["content"], f"{commit_type} - {day:%Y-%m-%d %H:%M}", day)
+    if not writer.close():
+        raise RuntimeError(f"backend {backend} failed")
+    return time.perf_counter() - start
+
+
+def checkout_seconds(repo_path, work_dir, repeat=3):
+    """Best time of a full checkout of HEAD into an empty clone"""
+    clone = os.path.join(work_dir, "clone")
+    best = None
+    for _ in range(repeat):
+        subprocess.run(['git', 'clone', '-q', '--no-checkout', repo_path, clone], check=True)
+        start = time.perf_counter()
+        git(clone, 'checkout', '-q', 'main')
+        seconds = time.perf_counter() - start
+        shutil.rmtree(clone)
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def tree_shape(repo_path):
+    """Number of files and the entry count of the largest tree at HEAD"""
+    entries = git(repo_path, 'ls-tree', '-r', '-t', '--name-only', 'HEAD').splitlines()
+    parents = Counter(os.path.dirname(entry) for entry in entries)
+    files = len(git(repo_path, 'ls-files').splitlines())
+    return files, max(parents.values())
+
+
+def main():
+    """Run the benchmark for every layout"""
+    parser = argparse.ArgumentParser(description="Benchmark repository layouts")
+    parser.add_argument("--commits", type=int, default=10000)
+    parser.add_argument("--backend", default="fast-import")
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS))
+    args = parser.parse_args()
+    os.environ.update(IDENTITY)
+
+    print(f"🏁 Layout benchmark: {args.commits} commits with the {args.backend} backend")
+    print("=" * 60)
+    for layout in args.layouts:
+        work_dir = tempfile.mkdtemp(prefix=f"bench_layout_{layout}_")
+        repo_path = os.path.join(work_dir, "repo")
+        os.makedirs(repo_path)
+        try:
+            commit_time = build_history(repo_path, LAYOUTS[layout], args.backend, args.commits)
+            checkout_time = checkout_seconds(repo_path, work_dir)
+            files, widest = tree_shape(repo_path)
+            print(f"{layout:<8} files: {files:>6}  largest tree: {widest:>6}  "
+                  f"commit: {commit_time:>7.2f}s ({args.commits / commit_time:>6,.0f}/s)  "
+                  f"checkout: {checkout_time:.2f}s")
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
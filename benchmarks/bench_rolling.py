@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Rolling File Pool Benchmark
+Compares pack size, clone size and checkout time after a simulated
+multi-year run of the dated-file behaviour and the rolling file pool
+"""
+
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from layouts import flat_layout, RollingFilePool
+from bench_layout import IDENTITY, git, build_history, checkout_seconds
+
+
+def directory_size(path):
+    """Total size in bytes of the files under path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def pack_size(repo_path):
+    """Size of the repository once everything is in a single pack"""
+    git(repo_path, 'repack', '-adq')
+    return sum(os.path.getsize(path) for path in
+               glob.glob(os.path.join(repo_path, '.git', 'objects', 'pack', '*.pack')))
+
+
+def clone_size(repo_path, work_dir):
+    """Size of a full (non-hardlinked) clone including its checkout, and how long it took"""
+    clone = os.path.join(work_dir, "clone")
+    start = time.perf_counter()
+    subprocess.run(['git', 'clone', '-q', '--no-local', repo_path, clone], check=True)
+    seconds = time.perf_counter() - start
+    size = directory_size(clone)
+    shutil.rmtree(clone)
+    return size, seconds
+
+
+def main():
+    """Run the benchmark for the dated and rolling modes"""
+    parser = argparse.ArgumentParser(description="Benchmark the rolling file pool")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=5)
+    parser.add_argument("--pool", type=int, default=64, help="rolling pool size")
+    parser.add_argument("--backend", default="fast-import")
+    args = parser.parse_args()
+    os.environ.update(IDENTITY)
+    commits = args.years * 365 * args.per_day
+
+    print(f"🏁 Rolling pool benchmark: {commits} commits over {args.years} years "
+          f"with the {args.backend} backend")
+    print("=" * 60)
+    modes = [("dated", lambda: flat_layout), (f"rolling/{args.pool}", lambda: RollingFilePool(args.pool))]
+    for mode, allocator in modes:
+        work_dir = tempfile.mkdtemp(prefix="bench_rolling_")
+        repo_path = os.path.join(work_dir, "repo")
+        os.makedirs(repo_path)
+        try:
+            commit_time = build_history(repo_path, allocator(), args.backend, commits, args.per_day)
+            files = len(git(repo_path, 'ls-tree', '-r', '--name-only', 'HEAD').splitlines())
+            packed = pack_size(repo_path)
+            cloned, clone_time = clone_size(repo_path, work_dir)
+            checkout_time = checkout_seconds(repo_path, work_dir)
+            print(f"{mode:<12} files: {files:>6}  commit: {commit_time:>6.2f}s  "
+                  f"pack: {packed / 1024:>8,.0f} KiB  clone: {cloned / 1024:>8,.0f} KiB "
+                  f"in {clone_time:.2f}s  checkout: {checkout_time:.2f}s")
+        finally:
+            shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Template Rendering Benchmark
+Compares renders/sec of the compiled template registry with the old approach
+of formatting every template (and calling strftime for each) on every commit
+"""
+
+import os
+import sys
+import time
+import random
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backfill_bot
+import year_backfill
+
+
+def legacy_generate(templates, date):
+    """Old behaviour: build every path and content for the date, then pick one"""
+    commit_type = random.choice([commit_type for commit_type, _, _ in templates])
+    rendered = {
+        commit_type: {
+            "file": path.format(day=date.strftime('%Y%m%d')),
+            "content": content.format(date=date.strftime('%Y-%m-%d')),
+        }
+        for commit_type, path, content in templates
+    }
+    return rendered[commit_type]
+
+
+def registry_generate(registry, date):
+    """New behaviour: pick a type and render only that template"""
+    return registry.render(random.choice(registry.types), date)
+
+
+def measure(generate, source, dates):
+    """Return renders per second of generate over dates"""
+    start = time.perf_counter()
+    for date in dates:
+        generate(source, date)
+    return len(dates) / (time.perf_counter() - start)
+
+
+def main():
+    """Run the benchmark for both bots"""
+    random.seed(0)
+    start = datetime.datetime(2025, 1, 1, 9)
+    # A year at 5 commits/day, the shape backfill_entire_year produces
+    dates = [start + datetime.timedelta(days=i // 5, hours=i % 5) for i in range(365 * 5)] * 20
+
+    print("🏁 Template rendering benchmark")
+    print("=" * 60)
+    for name, module in [("GitHubBackfillBot", backfill_bot), ("YearBackfillBot", year_backfill)]:
+        before = measure(legacy_generate, module.COMMIT_TEMPLATES, dates)
+        after = measure(registry_generate, module.TEMPLATES, dates)
+        print(f"{name:<20} before: {before:>10,.0f}/s  after: {after:>10,.0f}/s  "
+              f"speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
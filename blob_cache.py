@@ -0,0 +1,120 @@
+"""
+Blob Cache
+Content-addressed map from generated file contents to the git blobs storing them
+"""
+
+import os
+import hashlib
+
+from git_backend import git_dir, run_git
+
+CACHE_NAME = "backfill_blob_cache.bin"
+DIGEST_SIZE = 16
+# One record per entry: content digest followed by the raw 20-byte blob id
+RECORD_SIZE = DIGEST_SIZE + 20
+# Oldest entries are dropped beyond this many (~7 MB on disk)
+MAX_ENTRIES = 200000
+
+
+def content_key(data):
+    """BLAKE2b digest of file content, the cache key"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+class BlobCache:
+    """Content digest -> blob id, so identical content is shipped only once
+
+    Only backends that move content elsewhere use it: fast-import streams
+    it inline and the sharded backend sends it to its worker processes. On
+    a hit they pass the blob id instead. The bare and pack backends do not,
+    as their object writers already skip objects they hold. Entries added
+    during a run stay pending until confirm() (the backend wrote its
+    objects) or discard() (it failed), like the checkpoint journal. The
+    cache is kept in the git directory between runs.
+    """
+
+    def __init__(self, path=None, entries=None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.pending = []
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, data):
+        """Return (key, blob id) for content, the id being None on a miss"""
+        key = content_key(data)
+        oid = self.entries.get(key)
+        if oid is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, oid
+
+    def add(self, key, oid):
+        """Remember the blob id just written for a key returned by lookup()"""
+        self.entries[key] = oid
+        self.pending.append(key)
+        self.added += 1
+
+    def confirm(self):
+        """The pending blobs are in the repository: keep them and save the cache"""
+        self.pending = []
+        if self.path:
+            self.save(self.path)
+
+    def discard(self):
+        """The pending blobs were never written: forget them"""
+        for key in self.pending:
+            self.entries.pop(key, None)
+        self.pending = []
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        """One line describing the cache use of this run"""
+        return (f"{self.hits}/{self.hits + self.misses} hits ({self.hit_rate:.1%}), "
+                f"{self.added} new blobs, {len(self.entries)} cached")
+
+    def save(self, path):
+        """Atomically write the newest MAX_ENTRIES entries as fixed-size records"""
+        items = list(self.entries.items())[-MAX_ENTRIES:]
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(b"".join(key + bytes.fromhex(oid) for key, oid in items))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def read(cls, path):
+        """Read the entries written by save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % RECORD_SIZE
+        return {data[i:i + DIGEST_SIZE]: data[i + DIGEST_SIZE:i + RECORD_SIZE].hex()
+                for i in range(0, usable, RECORD_SIZE)}
+
+    @classmethod
+    def load(cls, repo_path):
+        """Return the repository's cache, keeping only blobs still in its object store
+
+        Blobs of an interrupted run may have been pruned since, so every id is
+        checked with one git cat-file --batch-check pass.
+        """
+        path = os.path.join(git_dir(repo_path), CACHE_NAME)
+        try:
+            entries = cls.read(path)
+        except OSError:
+            return cls(path)
+        if entries:
+            check = run_git(repo_path, 'cat-file', '--batch-check=%(objectname) %(objecttype)',
+                            input="\n".join(entries.values()) + "\n")
+            present = {line.split()[0] for line in check.splitlines() if line.endswith(" blob")}
+            entries = {key: oid for key, oid in entries.items() if oid in present}
+        return cls(path, entries)
@@ -0,0 +1,103 @@
+"""
+Bot Logging
+Structured JSON logs written to bot.log and bot_error.log off the commit loop
+"""
+
+import os
+import copy
+import json
+import queue
+import atexit
+import logging
+import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOGGER_NAME = "backfill"
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+_listeners = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the event fields passed through log_event"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_text:
+            entry["traceback"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue records with their fields intact; formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            # Tracebacks are rendered now so the queued record holds no frames
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(log_dir, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+    """Route the backfill logger through a queue to rotating bot.log / bot_error.log
+
+    The commit loop only enqueues records; a QueueListener thread formats
+    them, writes both files and rotates them once they reach max_bytes.
+    Calling it again with the same directory reuses the running listener.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    log_dir = os.path.abspath(log_dir)
+    if log_dir in _listeners:
+        return logger
+    shutdown_logging()
+    os.makedirs(log_dir, exist_ok=True)
+
+    formatter = JsonFormatter()
+    handlers = []
+    for name, level in (("bot.log", logging.INFO), ("bot_error.log", logging.ERROR)):
+        handler = RotatingFileHandler(os.path.join(log_dir, name), maxBytes=max_bytes,
+                                      backupCount=backup_count, delay=True)
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+        handlers.append(handler)
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[log_dir] = listener
+
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(StructuredQueueHandler(records))
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+        logger.removeHandler(handler)
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def log_event(logger, event, level=logging.INFO, exc_info=None, **fields):
+    """Log one structured event (plan_id, date, phase, duration, error, ...)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+
+# Nothing reaches stderr through logging's last resort handler when logging is off
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+atexit.register(shutdown_logging)
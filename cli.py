@@ -0,0 +1,225 @@
+"""
+Command Line
+Flags shared by backfill_bot.py and year_backfill.py so both run unattended
+"""
+
+import os
+import sys
+import argparse
+import datetime
+import itertools
+
+from backfill_base import DEFAULT_REPO_PATH
+
+# git_backend.BACKENDS, layouts.LAYOUTS and maintenance.DEFAULT_THRESHOLD, spelled out so
+# --help imports none of them
+BACKENDS = ("worktree", "fast-import", "bare", "pack", "sharded")
+LAYOUTS = ("flat", "date", "hashed")
+DEFAULT_THRESHOLD = 1000
+
+# Mode -> (description, default commits per day, highest commits per day allowed)
+MODES = {
+    "days": ("Fill the contribution graph for the past N weekdays", 2, None),
+    "year": ("Fill the contribution graph for every day of 2025", 2, 5),
+}
+
+
+def parse_date(value):
+    """YYYY-MM-DD argument as a date"""
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value} (expected YYYY-MM-DD)")
+
+
+def parse_per_day(value):
+    """Commits per day argument: a count (2) or an inclusive range drawn per day (1-4)"""
+    low, _, high = value.partition("-")
+    try:
+        counts = (int(low), int(high or low))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid commits per day: {value} (expected N or LOW-HIGH)")
+    if counts[0] < 0 or counts[0] > counts[1]:
+        raise argparse.ArgumentTypeError(f"invalid commits per day: {value}")
+    return counts[0] if counts[0] == counts[1] else counts
+
+
+def build_parser(mode):
+    """Argument parser for one of the bots"""
+    description, default_per_day, max_per_day = MODES[mode]
+    parser = argparse.ArgumentParser(description=description)
+    if mode == "days":
+        parser.add_argument("--days", type=int, default=30,
+                            help="how many days back to fill, ending yesterday (default: 30)")
+    parser.add_argument("--commits-per-day", type=parse_per_day, default=default_per_day, metavar="N|LOW-HIGH",
+                        help=f"commits per day, or a range drawn per day (default: {default_per_day}"
+                             + (f", max {max_per_day})" if max_per_day else ")"))
+    parser.add_argument("--start", type=parse_date, metavar="YYYY-MM-DD",
+                        help="first day to fill" + (" (overrides --days)" if mode == "days" else " (default: 2025-01-01)"))
+    parser.add_argument("--end", type=parse_date, metavar="YYYY-MM-DD", help="last day to fill (default: yesterday)")
+    parser.add_argument("--repo", default=DEFAULT_REPO_PATH,
+                        help=f"repository to commit into (default: {DEFAULT_REPO_PATH})")
+    parser.add_argument("--backend", choices=BACKENDS, default="worktree",
+                        help="how commits are written (default: worktree)")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible schedule and commit types")
+    parser.add_argument("--layout", choices=LAYOUTS, default="flat",
+                        help="where generated files go: flat, date (dir/YYYY/MM/) or hashed (dir/xx/) "
+                             "(default: flat)")
+    parser.add_argument("--rolling-files", type=int, metavar="N",
+                        help="rewrite a pool of N files instead of adding a file per commit")
+    parser.add_argument("--commit-rate", type=float, metavar="PER_SEC",
+                        help="most commits per second (default: unlimited)")
+    parser.add_argument("--render-workers", type=int, default=0, metavar="N",
+                        help="threads rendering commit content ahead of the git writer (default: 0, inline)")
+    parser.add_argument("--realism-repo", metavar="PATH",
+                        help="draw commit days, counts, hours and types from this repository's history "
+                             "(overrides --commits-per-day)")
+    parser.add_argument("--no-push", action="store_true", help="leave the commits local")
+    parser.add_argument("--push-every-commits", type=int, metavar="N",
+                        help="push in batches of at most N commits (default: all at once)")
+    parser.add_argument("--push-every-mb", type=float, metavar="MB",
+                        help="push in batches of at most MB megabytes of objects (default: all at once)")
+    parser.add_argument("--maintenance-threshold", type=int, default=DEFAULT_THRESHOLD, metavar="N",
+                        help="repack with bitmaps and write a commit-graph once N commits were added "
+                             f"since the last time, 0 to never (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--timing", action="store_true", help="print per-phase duration histograms")
+    parser.add_argument("--timing-path", metavar="PATH",
+                        help="also write the phase timings to this JSON file (implies --timing)")
+    parser.add_argument("--metrics-path", metavar="PATH",
+                        help="write Prometheus metrics to this file (for the node-exporter textfile collector)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("-y", "--yes", action="store_true", help="do not ask for confirmation")
+    actions = parser.add_mutually_exclusive_group()
+    actions.add_argument("--dry-run", action="store_true", help="print the plan and exit without committing")
+    actions.add_argument("--compile-plan", metavar="PATH",
+                         help="write the resolved plan to a file (gzipped if it ends in .gz) and exit")
+    actions.add_argument("--execute-plan", metavar="PATH",
+                         help="commit a plan file written by --compile-plan instead of planning")
+    parser.add_argument("--split", type=int, metavar="N",
+                        help="with --compile-plan, also split the plan into N part files")
+    return parser
+
+
+def parse_args(mode, argv=None):
+    """Parse and cross-check the arguments of one of the bots"""
+    parser = build_parser(mode)
+    args = parser.parse_args(argv)
+    max_per_day = MODES[mode][2]
+    highest = args.commits_per_day[1] if isinstance(args.commits_per_day, tuple) else args.commits_per_day
+    if max_per_day and highest > max_per_day:
+        parser.error(f"--commits-per-day is at most {max_per_day}")
+    if mode == "days" and args.days < 1:
+        parser.error("--days must be at least 1")
+    if args.start and args.end and args.start > args.end:
+        parser.error("--start is after --end")
+    if args.maintenance_threshold < 0:
+        parser.error("--maintenance-threshold must not be negative")
+    for flag, value in (("--rolling-files", args.rolling_files), ("--commit-rate", args.commit_rate),
+                        ("--push-every-commits", args.push_every_commits),
+                        ("--push-every-mb", args.push_every_mb)):
+        if value is not None and value <= 0:
+            parser.error(f"{flag} must be positive")
+    if args.rolling_files and args.layout != "flat":
+        parser.error("--rolling-files replaces every file path, so it only works with --layout flat")
+    if args.render_workers < 0:
+        parser.error("--render-workers must not be negative")
+    if args.no_push and (args.push_every_commits or args.push_every_mb):
+        parser.error("--push-every-commits and --push-every-mb need a push (drop --no-push)")
+    if args.metrics_port is not None and not 0 < args.metrics_port < 65536:
+        parser.error("--metrics-port must be between 1 and 65535")
+    if args.split is not None and (not args.compile_plan or args.split < 1):
+        parser.error("--split needs --compile-plan and at least 1 part")
+    if not os.path.isdir(args.repo):
+        parser.error(f"--repo {args.repo} is not a directory")
+    if args.realism_repo and not os.path.isdir(args.realism_repo):
+        parser.error(f"--realism-repo {args.realism_repo} is not a directory")
+    return args
+
+
+def print_plan(plan):
+    """One line per planned day with its commit times, then the totals"""
+    from schedule import iter_plan
+    days = 0
+    for day, entries in itertools.groupby(iter_plan(plan), key=lambda entry: entry[0].date()):
+        times = [commit_datetime.strftime('%H:%M') for commit_datetime, _, _ in entries]
+        days += 1
+        print(f"  {day} {day.strftime('%a')}  {len(times)} commits  {' '.join(times)}")
+    print(f"🎯 Planned: {len(plan)} commits on {days} days")
+
+
+def confirm(question):
+    """Ask a yes/no question; without a terminal to ask on the answer is no"""
+    if not sys.stdin.isatty():
+        print("❌ Not running in a terminal: pass --yes to confirm")
+        return False
+    try:
+        return input(f"{question} (yes/no): ").strip().lower() == "yes"
+    except EOFError:
+        return False
+
+
+def run(mode, bot_class, argv=None):
+    """Run one of the bots from the command line, returning the exit status"""
+    args = parse_args(mode, argv)
+    options = {"repo_path": args.repo, "backend": args.backend, "seed": args.seed,
+               "layout": args.layout, "rolling_files": args.rolling_files,
+               "commit_rate": args.commit_rate, "render_workers": args.render_workers,
+               "push": not args.no_push, "push_every_commits": args.push_every_commits,
+               "push_every_mb": args.push_every_mb, "maintenance_threshold": args.maintenance_threshold,
+               "timing": args.timing, "timing_path": args.timing_path,
+               "metrics_path": args.metrics_path, "metrics_port": args.metrics_port}
+    if args.realism_repo:
+        options["realism_repo"] = args.realism_repo
+    if args.dry_run or args.compile_plan:
+        # Nothing is committed, so nothing is logged either
+        options["log_dir"] = False
+    if args.dry_run:
+        # A dry run leaves the repository exactly as it was
+        options["save_caches"] = False
+    bot = bot_class(**options)
+
+    if args.execute_plan:
+        from plan_file import PlanReader
+        try:
+            reader = PlanReader(args.execute_plan)
+            if reader.header.get("bot") != mode:
+                raise ValueError(f"{args.execute_plan} was compiled by the {reader.header.get('bot')} bot")
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"\n⚠️  WARNING: This will create {len(reader)} commits with past dates in {bot.repo_path}")
+        if not args.yes and not confirm("Are you sure you want to continue?"):
+            print("❌ Backfill cancelled")
+            return 1
+        result = bot.execute_plan(args.execute_plan)
+        return 0 if result["written"] and (result["pushed"] or args.no_push) else 1
+
+    if mode == "days":
+        plan = bot.plan_past_days(args.days, args.commits_per_day, args.start, args.end)
+    else:
+        plan = bot.plan_year(args.commits_per_day, args.start, args.end)
+
+    if args.dry_run:
+        print(f"🧪 Dry run: {bot.repo_path} ({args.backend} backend), nothing is committed or pushed")
+        print_plan(plan)
+        return 0
+
+    if args.compile_plan:
+        bot.compile_plan(plan, args.compile_plan, args.commits_per_day)
+        if args.split:
+            from plan_file import split_plan
+            for path in split_plan(args.compile_plan, args.split):
+                print(f"  📄 {path}")
+        return 0
+
+    print(f"\n⚠️  WARNING: This will create {len(plan)} commits with past dates in {bot.repo_path}")
+    if not args.yes and not confirm("Are you sure you want to continue?"):
+        print("❌ Backfill cancelled")
+        return 1
+
+    if mode == "days":
+        result = bot.backfill_past_days(args.days, args.commits_per_day, args.start, args.end, plan=plan)
+    else:
+        result = bot.backfill_entire_year(args.commits_per_day, args.start, args.end, plan=plan)
+    return 0 if result["written"] and (result["pushed"] or args.no_push) else 1
@@ -0,0 +1,58 @@
+"""
+Commit Templates
+Registry of commit templates compiled once and rendered on demand
+"""
+
+import datetime
+import functools
+from string import Formatter
+
+
+@functools.lru_cache(maxsize=4096)
+def date_fields(day):
+    """Return the date strings used by templates, memoized per calendar day"""
+    return {
+        "day": day.strftime('%Y%m%d'),
+        "date": day.strftime('%Y-%m-%d'),
+    }
+
+
+def compile_template(text):
+    """Split a template into (literal, field) pairs so rendering is a join"""
+    parts = []
+    for literal, field, _, _ in Formatter().parse(text):
+        parts.append((literal, field))
+    return parts
+
+
+def render_template(parts, fields):
+    """Render a compiled template with the given field values"""
+    return ''.join(literal + (fields[field] if field is not None else '')
+                   for literal, field in parts)
+
+
+class TemplateRegistry:
+    """Commit types with their file path and content templates
+
+    Templates use {day} (YYYYMMDD) and {date} (YYYY-MM-DD) placeholders and
+    are parsed once when the registry is built; render() only touches the
+    template that was picked.
+    """
+
+    def __init__(self, templates):
+        self.types = [commit_type for commit_type, _, _ in templates]
+        self.templates = {
+            commit_type: (compile_template(path), compile_template(content))
+            for commit_type, path, content in templates
+        }
+
+    def render(self, commit_type, date):
+        """Render the file path and content of one commit type for a date"""
+        day = date.date() if isinstance(date, datetime.datetime) else date
+        fields = date_fields(day)
+        path, content = self.templates[commit_type]
+        return {
+            "type": commit_type,
+            "file": render_template(path, fields),
+            "content": render_template(content, fields),
+        }
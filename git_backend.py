@@ -0,0 +1,602 @@
+"""
+Git Commit Backends
+Different ways of writing backfill commits into a repository
+"""
+
+import os
+import re
+import subprocess
+import datetime
+import hashlib
+
+from packfile import PackWriter, parse_tree, serialize_tree, serialize_commit
+from tree_builder import TreeBuilder
+from git_batch import GitBatch, ObjectReader, ObjectWriter
+from timing import NULL_TIMER
+
+
+def run_git(repo_path, *args, env=None, input=None):
+    """Run a git command and return its stripped stdout"""
+    result = subprocess.run(['git'] + list(args), cwd=repo_path, check=True,
+                            capture_output=True, text=True, env=env, input=input)
+    return result.stdout.strip()
+
+
+def git_dir(repo_path):
+    """Path of the repository's git directory"""
+    return os.path.join(repo_path, run_git(repo_path, 'rev-parse', '--git-dir'))
+
+
+def head_commit(repo_path):
+    """Id of the commit HEAD points at, or None on an unborn branch"""
+    try:
+        return run_git(repo_path, 'rev-parse', '--verify', '-q', 'HEAD') or None
+    except subprocess.CalledProcessError:
+        return None
+
+
+def git_date(target_date):
+    """Format a datetime the way the bots pass it to GIT_*_DATE"""
+    return target_date.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def raw_date(target_date):
+    """Format a naive local datetime as a raw git date (epoch and offset)"""
+    timestamp = int(target_date.timestamp())
+    offset = datetime.datetime.fromtimestamp(timestamp).astimezone().utcoffset()
+    minutes = int(offset.total_seconds()) // 60
+    sign = '+' if minutes >= 0 else '-'
+    minutes = abs(minutes)
+    return f"{timestamp} {sign}{minutes // 60:02d}{minutes % 60:02d}"
+
+
+def blob_id(data):
+    """Return the object id git assigns to a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def git_ident(repo_path, kind):
+    """Return the configured "Name <email>" for AUTHOR or COMMITTER"""
+    ident = run_git(repo_path, 'var', f'GIT_{kind}_IDENT')
+    # git var appends the current time, which we replace per commit
+    return ident.rsplit(' ', 2)[0]
+
+
+def list_files(repo_path, commit):
+    """Return {path: blob id} for every file of a commit, subdirectories included"""
+    files = {}
+    if commit:
+        for entry in run_git(repo_path, 'ls-tree', '-r', '-z', commit).split('\0'):
+            if entry:
+                info, path = entry.split('\t', 1)
+                files[path] = info.split()[2]
+    return files
+
+
+def branch_state(repo_path, files=False):
+    """What a backend needs to know before chaining commits onto the current branch
+
+    Returns a dict with the branch ref HEAD points at, the head commit and
+    its tree (both None on an unborn branch), the author and committer
+    idents and, with files=True, {path: blob id} of every file at the head.
+    """
+    head = head_commit(repo_path)
+    return {
+        "branch": run_git(repo_path, 'symbolic-ref', 'HEAD'),
+        "head": head,
+        "tree": run_git(repo_path, 'rev-parse', f'{head}^{{tree}}') if head else None,
+        "author": git_ident(repo_path, 'AUTHOR'),
+        "committer": git_ident(repo_path, 'COMMITTER'),
+        "files": list_files(repo_path, head) if files else None,
+    }
+
+
+def sync_checkout(repo_path, old_head, new_head, worktree=True):
+    """Move the index (and optionally working tree) of a non-bare repo to new_head"""
+    if run_git(repo_path, 'rev-parse', '--is-bare-repository') == 'true':
+        return
+    update = ['-u'] if worktree else []
+    if old_head:
+        run_git(repo_path, 'read-tree', '-m', *update, old_head, new_head)
+    else:
+        run_git(repo_path, 'read-tree', '-m', *update, new_head)
+
+
+class WorkTreeBackend:
+    """Write each commit through the working tree with git add and git commit"""
+
+    name = "worktree"
+    # Each commit is in the repository as soon as commit() returns
+    durable = True
+    # Phase timings go here when the bot hands over a PhaseTimer
+    timer = NULL_TIMER
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.heads = None
+
+    @property
+    def last_commit(self):
+        """Id of the newest commit (only looked up when asked for, through one cat-file process)"""
+        if self.heads is None:
+            self.heads = GitBatch(self.repo_path, 'cat-file', '--batch-check')
+        return self.heads.request(b'HEAD').split()[0].decode('ascii')
+
+    def resolve(self, commit):
+        """Commit ids are final as soon as they are created"""
+        return commit
+
+    def commit(self, path, content, message, target_date):
+        """Create one commit, raising CalledProcessError if git fails"""
+        with self.timer.phase("write_file"):
+            # Ensure directory exists
+            file_dir = os.path.dirname(os.path.join(self.repo_path, path))
+            if file_dir and not os.path.exists(file_dir):
+                os.makedirs(file_dir, exist_ok=True)
+
+            # Write content to file
+            file_path = os.path.join(self.repo_path, path)
+            with open(file_path, 'w') as f:
+                f.write(content)
+
+        # Add file to git
+        with self.timer.phase("git_add"):
+            subprocess.run(['git', 'add', path],
+                           cwd=self.repo_path, check=True)
+
+        # Set environment variables for commit date
+        env = os.environ.copy()
+        env['GIT_AUTHOR_DATE'] = git_date(target_date)
+        env['GIT_COMMITTER_DATE'] = git_date(target_date)
+
+        with self.timer.phase("git_commit"):
+            subprocess.run(['git', 'commit', '-m', message],
+                           cwd=self.repo_path, check=True, env=env)
+        return True
+
+    def close(self):
+        """Nothing is buffered, every commit is already in the repository"""
+        if self.heads is not None:
+            self.heads.close()
+            self.heads = None
+        return True
+
+
+class FastImportBackend:
+    """Stream every commit into a single long-lived git fast-import process"""
+
+    name = "fast-import"
+    durable = False
+    timer = NULL_TIMER
+    # Content -> blob id cache shared with the bot (None = hash and write every blob)
+    blob_cache = None
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.process = None
+        self.branch = None
+        self.old_head = None
+        self.blobs = {}
+        self.commits = 0
+        self.marks = {}
+        self.marks_path = None
+        self.last_commit = None
+
+    def resolve(self, commit):
+        """Map a ":mark" reference to the commit id fast-import assigned it"""
+        return self.marks.get(commit, commit)
+
+    def start(self):
+        """Read the current branch state and launch git fast-import"""
+        # What each path holds is kept so unchanged files are skipped like git commit does
+        state = branch_state(self.repo_path, files=True)
+        self.branch = state["branch"]
+        self.old_head = state["head"]
+        self.author = state["author"]
+        self.committer = state["committer"]
+        self.blobs = state["files"]
+
+        self.marks_path = os.path.join(git_dir(self.repo_path), f'backfill-marks-{os.getpid()}')
+        self.process = subprocess.Popen(
+            ['git', 'fast-import', '--quiet', '--date-format=raw', '--done',
+             f'--export-marks={self.marks_path}'],
+            cwd=self.repo_path, stdin=subprocess.PIPE)
+
+    def commit(self, path, content, message, target_date):
+        """Queue one commit on the fast-import stream"""
+        if self.process is None:
+            with self.timer.phase("start"):
+                self.start()
+
+        data = content.encode('utf-8')
+        key, oid = self.blob_cache.lookup(data) if self.blob_cache is not None else (None, None)
+        cached = oid is not None
+        if not cached:
+            oid = blob_id(data)
+        if self.blobs.get(path) == oid:
+            # git commit would fail with "nothing to commit"
+            return False
+        self.blobs[path] = oid
+
+        when = raw_date(target_date)
+        message_bytes = (message + '\n').encode('utf-8')
+        self.last_commit = f":{self.commits + 1}"
+        stream = [
+            f"commit {self.branch}\n".encode('utf-8'),
+            f"mark {self.last_commit}\n".encode('utf-8'),
+            f"author {self.author} {when}\n".encode('utf-8'),
+            f"committer {self.committer} {when}\n".encode('utf-8'),
+            b"data %d\n" % len(message_bytes), message_bytes,
+        ]
+        if self.commits == 0 and self.old_head:
+            stream.append(f"from {self.old_head}\n".encode('utf-8'))
+        if cached:
+            # Already in the repository or earlier in this stream
+            stream.append(f"M 100644 {oid} {path}\n\n".encode('utf-8'))
+        else:
+            stream += [
+                f"M 100644 inline {path}\n".encode('utf-8'),
+                b"data %d\n" % len(data), data, b"\n\n",
+            ]
+            if self.blob_cache is not None:
+                self.blob_cache.add(key, oid)
+        with self.timer.phase("stream"):
+            self.process.stdin.write(b"".join(stream))
+        self.commits += 1
+        return True
+
+    def close(self):
+        """Finish the stream, wait for fast-import and refresh the checkout"""
+        if self.process is None:
+            return True
+        with self.timer.phase("fast_import"):
+            self.process.stdin.write(b"done\n")
+            self.process.stdin.close()
+            returncode = self.process.wait()
+        self.process = None
+        if os.path.exists(self.marks_path):
+            with open(self.marks_path) as f:
+                self.marks = dict(line.split() for line in f if line.strip())
+            os.remove(self.marks_path)
+        if returncode != 0:
+            return False
+        if self.commits:
+            new_head = run_git(self.repo_path, 'rev-parse', self.branch)
+            with self.timer.phase("checkout"):
+                sync_checkout(self.repo_path, self.old_head, new_head)
+        self.commits = 0
+        return True
+
+
+def delta_key(path):
+    """Group paths generated from the same template (they differ only in digits)"""
+    return re.sub(r'[0-9]', '', path)
+
+
+class ObjectDatabaseBackend:
+    """Build blobs, trees and commits directly in the object database
+
+    Nothing is written to the working tree; the branch ref is only moved
+    once in close(). Works on bare clones. In a non-bare repository the
+    index is refreshed so the next git commit does not revert the new
+    files, and the files show up as deleted until a checkout.
+
+    Existing trees are read through one long-lived git cat-file --batch
+    process and new objects are written as loose objects from Python, so a
+    commit costs no process start at all.
+    """
+
+    name = "bare"
+    # Commits only become reachable when close() moves the branch
+    durable = False
+    timer = NULL_TIMER
+    # No blob_cache: the object writers already skip objects they hold, so a
+    # content lookup would only add a second hash per commit
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.branch = None
+        self.old_head = None
+        self.head = None
+        self.tree = None
+        self.trees = None
+        self.reader = None
+        self.writer = None
+
+    @property
+    def last_commit(self):
+        """Id of the newest commit written"""
+        return self.head
+
+    def resolve(self, commit):
+        """Commit ids are final as soon as they are created"""
+        return commit
+
+    def start(self):
+        """Read the branch the new commits will be chained onto"""
+        state = branch_state(self.repo_path)
+        self.old_head = state["head"]
+        self.head = self.old_head
+        self.tree = state["tree"]
+        self.author = state["author"]
+        self.committer = state["committer"]
+        self.trees = TreeBuilder(self.tree, self.read_tree, self.write_tree_object)
+        # Set last: a start that failed part way is retried by the next commit
+        self.branch = state["branch"]
+
+    def read_tree(self, tree):
+        """Return {name: (mode, type, oid)} for the entries of a tree object"""
+        if self.reader is None:
+            self.reader = ObjectReader(self.repo_path)
+        kind, data = self.reader.read(tree)
+        if kind != 'tree':
+            raise ValueError(f"{tree} is not a tree")
+        return parse_tree(data)
+
+    def write_object(self, kind, data, delta_key=None):
+        """Store an object and return its id (delta_key only matters to packs)"""
+        if self.writer is None:
+            self.writer = ObjectWriter(self.repo_path)
+        return self.writer.write(kind, data)
+
+    def write_blob(self, path, content):
+        """Store a blob and return its id"""
+        return self.write_object('blob', content.encode('utf-8'), delta_key=delta_key(path))
+
+    def write_tree_object(self, path, entries):
+        """Store a tree with the given entries and return its id"""
+        return self.write_object('tree', serialize_tree(entries), delta_key='tree:' + path)
+
+    def write_commit(self, tree, message, target_date):
+        """Store a commit of tree on top of the current head and return its id"""
+        when = raw_date(target_date)
+        parents = [self.head] if self.head else []
+        data = serialize_commit(tree, parents, f"{self.author} {when}",
+                                f"{self.committer} {when}", message + '\n')
+        return self.write_object('commit', data)
+
+    def stop(self):
+        """Shut the batch process down"""
+        if self.reader is not None:
+            self.reader.close()
+        self.reader = None
+        self.writer = None
+
+    def commit(self, path, content, message, target_date):
+        """Write the blob, the trees along path and the commit object"""
+        if self.branch is None:
+            with self.timer.phase("start"):
+                self.start()
+
+        with self.timer.phase("blob"):
+            blob = self.write_blob(path, content)
+        if not self.trees.set_file(path, blob):
+            # git commit would fail with "nothing to commit"
+            return False
+        with self.timer.phase("trees"):
+            tree = self.trees.write()
+
+        with self.timer.phase("commit_object"):
+            self.head = self.write_commit(tree, message, target_date)
+        self.tree = tree
+        return True
+
+    def close(self):
+        """Point the branch at the last commit written"""
+        self.stop()
+        if self.branch is None or self.head == self.old_head:
+            return True
+        with self.timer.phase("update_ref"):
+            run_git(self.repo_path, 'update-ref', self.branch, self.head, self.old_head or '0' * 40)
+            sync_checkout(self.repo_path, self.old_head, self.head, worktree=False)
+        self.branch = None
+        return True
+
+
+class PackBackend(ObjectDatabaseBackend):
+    """Build the whole backfill in memory and write it as a single packfile
+
+    Blobs and trees are delta-compressed against the previous version of the
+    same template or directory, so no loose objects are left behind.
+    """
+
+    name = "pack"
+
+    def start(self):
+        """Start an empty pack and read the branch state"""
+        self.pack = PackWriter()
+        super().start()
+
+    def write_object(self, kind, data, delta_key=None):
+        """Add an object to the pack"""
+        return self.pack.add(kind, data, delta_key=delta_key)
+
+    def close(self):
+        """Write the pack, then point the branch at the last commit"""
+        self.stop()
+        if self.branch is None or self.head == self.old_head:
+            return True
+        with self.timer.phase("pack_write"):
+            self.pack.write(os.path.join(git_dir(self.repo_path), 'objects', 'pack'))
+        self.pack = None
+        return super().close()
+
+
+# What every shard of one ShardedBackend.close() shares, set once per worker process
+_shard_worker = {}
+
+
+def init_shard_worker(repo_path, base_tree, changes, pack_dir):
+    """Worker initializer: receive the shared state once instead of with every shard
+
+    changes are the (path, blob id) pairs of every buffered commit, in
+    order; a shard replays the ones before its first commit.
+    """
+    _shard_worker.update(repo_path=repo_path, base_tree=base_tree, changes=changes,
+                         pack_dir=pack_dir, reader=None)
+
+
+def read_shard_tree(oid):
+    """Return {name: (mode, type, oid)} of an existing tree through the worker's cat-file"""
+    # Opened on first use and left to exit with the worker, so every shard it builds shares it
+    if _shard_worker["reader"] is None:
+        _shard_worker["reader"] = ObjectReader(_shard_worker["repo_path"])
+    kind, data = _shard_worker["reader"].read(oid)
+    if kind != 'tree':
+        raise ValueError(f"{oid} is not a tree")
+    return parse_tree(data)
+
+
+def build_shard(first, files):
+    """Worker: write the blobs and trees of one shard into its own pack
+
+    first is the number of the shard's first commit; the newest blob of
+    every path changed before it is only replayed into the in-memory tree,
+    not written. Files come as (path, content, blob id); content is None
+    for blobs that are already stored. Returns the root tree id after each
+    of the shard's files.
+    """
+    pack = PackWriter()
+    trees = TreeBuilder(_shard_worker["base_tree"], read_shard_tree,
+                        lambda path, entries: pack.add('tree', serialize_tree(entries),
+                                                       delta_key='tree:' + path))
+    for path, blob in dict(_shard_worker["changes"][:first]).items():
+        trees.set_file(path, blob)
+
+    tree_ids = []
+    for path, content, blob in files:
+        if content is not None:
+            blob = pack.add('blob', content.encode('utf-8'), delta_key=delta_key(path))
+        trees.set_file(path, blob)
+        tree_ids.append(trees.write())
+    if len(pack):
+        pack.write(_shard_worker["pack_dir"])
+    return tree_ids
+
+
+class ShardedBackend:
+    """Build history month by month in parallel worker processes
+
+    Commits are buffered until close(). Each calendar month becomes a shard
+    whose blobs and trees are built by its own process into its own pack.
+    A final serial pass chains the commit objects into one linear history,
+    identical to what the commit-by-commit backends produce.
+    """
+
+    name = "sharded"
+    durable = False
+    timer = NULL_TIMER
+    # Content -> blob id cache shared with the bot (None = hash and write every blob)
+    blob_cache = None
+
+    def __init__(self, repo_path, workers=None):
+        self.repo_path = repo_path
+        self.workers = workers or os.cpu_count() or 1
+        self.branch = None
+        self.pending = []
+        self.blobs = {}
+        self.commit_ids = {}
+        self.last_commit = None
+
+    def start(self):
+        """Read the branch state and what every path currently holds"""
+        state = branch_state(self.repo_path, files=True)
+        self.old_head = state["head"]
+        self.base_tree = state["tree"]
+        self.author = state["author"]
+        self.committer = state["committer"]
+        self.blobs = state["files"]
+        # Set last: a start that failed part way is retried by the next commit
+        self.branch = state["branch"]
+
+    def resolve(self, commit):
+        """Map a "#n" placeholder to the id of the n-th commit built"""
+        return self.commit_ids.get(commit, commit)
+
+    def commit(self, path, content, message, target_date):
+        """Buffer one commit; unchanged files are skipped like git commit does"""
+        if self.branch is None:
+            with self.timer.phase("start"):
+                self.start()
+        data = content.encode('utf-8')
+        key, oid = self.blob_cache.lookup(data) if self.blob_cache is not None else (None, None)
+        cached = oid is not None
+        if not cached:
+            oid = blob_id(data)
+        if self.blobs.get(path) == oid:
+            return False
+        self.blobs[path] = oid
+        if cached:
+            content = None
+        elif self.blob_cache is not None:
+            self.blob_cache.add(key, oid)
+        self.last_commit = f"#{len(self.pending)}"
+        self.pending.append((path, content, message, target_date, oid))
+        return True
+
+    def shards(self):
+        """Split the buffered commits into runs of the same calendar month"""
+        shards = []
+        for entry in self.pending:
+            month = (entry[3].year, entry[3].month)
+            if not shards or shards[-1][0] != month:
+                shards.append((month, []))
+            shards[-1][1].append(entry)
+        return [entries for _, entries in shards]
+
+    def close(self):
+        """Build all shards in parallel, stitch the commits and move the branch"""
+        if not self.pending:
+            return True
+        # Imported here: multiprocessing is only worth loading once there is work
+        from concurrent.futures import ProcessPoolExecutor
+
+        pack_dir = os.path.join(git_dir(self.repo_path), 'objects', 'pack')
+        shards = self.shards()
+
+        # Each worker gets the changes of all commits once; a shard only sends its own files
+        changes = [(path, oid) for path, _, _, _, oid in self.pending]
+        with self.timer.phase("shards"), \
+                ProcessPoolExecutor(max_workers=min(self.workers, len(shards)), initializer=init_shard_worker,
+                                    initargs=(self.repo_path, self.base_tree, changes, pack_dir)) as pool:
+            futures = []
+            first = 0
+            for shard in shards:
+                files = [(path, content, oid) for path, content, _, _, oid in shard]
+                futures.append(pool.submit(build_shard, first, files))
+                first += len(shard)
+            tree_ids = [tree for future in futures for tree in future.result()]
+
+        # Commits depend on their parent's id, so this part stays serial (and cheap)
+        with self.timer.phase("stitch"):
+            pack = PackWriter()
+            head = self.old_head
+            for i, ((_, _, message, target_date, _), tree) in enumerate(zip(self.pending, tree_ids)):
+                when = raw_date(target_date)
+                data = serialize_commit(tree, [head] if head else [], f"{self.author} {when}",
+                                        f"{self.committer} {when}", message + '\n')
+                head = pack.add('commit', data)
+                self.commit_ids[f"#{i}"] = head
+            pack.write(pack_dir)
+
+        with self.timer.phase("update_ref"):
+            run_git(self.repo_path, 'update-ref', self.branch, head, self.old_head or '0' * 40)
+            sync_checkout(self.repo_path, self.old_head, head, worktree=False)
+        self.pending = []
+        return True
+
+
+BACKENDS = {
+    WorkTreeBackend.name: WorkTreeBackend,
+    FastImportBackend.name: FastImportBackend,
+    ObjectDatabaseBackend.name: ObjectDatabaseBackend,
+    PackBackend.name: PackBackend,
+    ShardedBackend.name: ShardedBackend,
+}
+
+
+def create_backend(name, repo_path):
+    """Instantiate the commit backend registered under name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown commit backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](repo_path)
@@ -0,0 +1,146 @@
+"""
+History Index
+Per-day commit counts of the existing history, cached on disk by HEAD
+"""
+
+import os
+import subprocess
+
+import numpy as np
+
+from git_backend import git_dir, head_commit, run_git
+
+CACHE_NAME = "backfill_history_index.npz"
+CHUNK_LINES = 65536
+
+
+class HistoryIndex:
+    """Number of commits per author day reachable from HEAD
+
+    Counts live in one int32 array starting at `origin` (a datetime64[D]).
+    The index is built from a single streamed git log pass and cached in the
+    git directory; when HEAD moves forward only the new commits are read.
+    """
+
+    def __init__(self, head=None, origin=None, counts=None):
+        self.head = head
+        self.origin = origin
+        self.counts = counts if counts is not None else np.zeros(0, dtype=np.int32)
+
+    @property
+    def total(self):
+        """Number of commits indexed"""
+        return int(self.counts.sum())
+
+    @property
+    def active_days(self):
+        """Number of days with at least one commit"""
+        return int(np.count_nonzero(self.counts))
+
+    def add_days(self, days):
+        """Count one commit for every entry of a datetime64[D] array"""
+        if len(days) == 0:
+            return
+        numbers = days.astype(np.int64)
+        low, high = int(numbers.min()), int(numbers.max())
+        origin = low if self.origin is None else int(self.origin.astype(np.int64))
+        new_origin = min(origin, low)
+        new_length = max(high - new_origin + 1, origin - new_origin + len(self.counts))
+        if new_origin != origin or new_length != len(self.counts):
+            grown = np.zeros(new_length, dtype=np.int32)
+            start = origin - new_origin
+            grown[start:start + len(self.counts)] = self.counts
+            self.counts = grown
+        self.origin = np.datetime64(new_origin, 'D')
+        np.add.at(self.counts, numbers - new_origin, 1)
+
+    def counts_for(self, days):
+        """Existing commit counts for each day of a datetime64[D] array"""
+        result = np.zeros(len(days), dtype=np.int32)
+        if self.origin is None or len(days) == 0:
+            return result
+        offsets = days.astype(np.int64) - int(self.origin.astype(np.int64))
+        inside = (offsets >= 0) & (offsets < len(self.counts))
+        result[inside] = self.counts[offsets[inside]]
+        return result
+
+    def scan(self, repo_path, revisions):
+        """Stream `git log` over revisions and count commits per author day"""
+        process = subprocess.Popen(
+            ['git', 'log', '--format=%ad', '--date=short'] + revisions,
+            cwd=repo_path, stdout=subprocess.PIPE, text=True)
+        chunk = []
+        for line in process.stdout:
+            chunk.append(line.strip())
+            if len(chunk) >= CHUNK_LINES:
+                self.add_days(np.array(chunk, dtype='datetime64[D]'))
+                chunk = []
+        self.add_days(np.array(chunk, dtype='datetime64[D]'))
+        process.stdout.close()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, 'git log')
+
+    def save(self, path):
+        """Write the index to an .npz cache file"""
+        np.savez(path, head=np.array(self.head or ''),
+                 origin=np.array(self.origin if self.origin is not None else 'NaT',
+                                 dtype='datetime64[D]'),
+                 counts=self.counts)
+
+    @classmethod
+    def read(cls, path):
+        """Read an index written by save()"""
+        with np.load(path) as data:
+            origin = data['origin'][()]
+            return cls(head=str(data['head']) or None,
+                       origin=None if np.isnat(origin) else origin,
+                       counts=data['counts'])
+
+    @classmethod
+    def load(cls, repo_path, save=True):
+        """Return the index for HEAD, reusing and extending the cached one (and updating it if save)"""
+        return load_by_head(repo_path, CACHE_NAME, cls.read, cls, save=save)
+
+
+def load_by_head(repo_path, cache_name, read, empty, save=True):
+    """Return a history summary for HEAD, cached by HEAD in the git directory
+
+    read(path) loads the cache file and empty() starts a new summary; both
+    give objects with a head, scan(repo_path, revisions) and save(path).
+    When HEAD moved forward from the cached head only the new commits are
+    scanned, otherwise the whole history is. The cache is only written
+    back when save is true.
+    """
+    head = head_commit(repo_path)
+    if head is None:
+        return empty()
+    cache_path = os.path.join(git_dir(repo_path), cache_name)
+
+    summary = None
+    if os.path.exists(cache_path):
+        try:
+            summary = read(cache_path)
+        except (OSError, ValueError, KeyError):
+            summary = None
+    if summary is not None and summary.head == head:
+        return summary
+
+    if summary is not None and summary.head and is_ancestor(repo_path, summary.head, head):
+        # HEAD moved forward: only scan the new commits
+        summary.scan(repo_path, [f'{summary.head}..{head}'])
+    else:
+        summary = empty()
+        summary.scan(repo_path, [head])
+    summary.head = head
+    if save:
+        summary.save(cache_path)
+    return summary
+
+
+def is_ancestor(repo_path, ancestor, commit):
+    """Whether ancestor is reachable from commit"""
+    try:
+        run_git(repo_path, 'merge-base', '--is-ancestor', ancestor, commit)
+        return True
+    except subprocess.CalledProcessError:
+        return False
@@ -0,0 +1,87 @@
+"""
+Checkpoint Journal
+Append-only JSONL record of completed planned commits so reruns can resume
+"""
+
+import os
+import json
+
+
+class CheckpointJournal:
+    """Append-only journal mapping plan ids to the commits that fulfilled them
+
+    Lookups are a dict membership test. Each record is handed to the OS as
+    soon as it is written (so a crashed process loses nothing), but fsync
+    only runs every sync_every records and on close.
+
+    Entries for commits that are not durable yet (buffered backends) are
+    held back until confirm() is called once the backend has written them.
+    """
+
+    def __init__(self, path, sync_every=100):
+        self.path = path
+        self.sync_every = sync_every
+        self.done = {}
+        self.pending = []
+        self.unsynced = 0
+        self.load()
+        # Line buffered: one write() per record, fsync batched in sync()
+        self.file = open(path, 'a', buffering=1)
+
+    def load(self):
+        """Read existing records"""
+        self.done = self.read(self.path)
+
+    @staticmethod
+    def read(path):
+        """{plan id: commit} of a journal file, ignoring a torn last line from a crash"""
+        done = {}
+        if not os.path.exists(path):
+            return done
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                done[record["plan_id"]] = record.get("commit")
+        return done
+
+    def __contains__(self, plan_id):
+        return plan_id in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def record(self, plan_id, commit, durable=True):
+        """Record a completed plan entry, or hold it until confirm() if not durable"""
+        if not durable:
+            self.pending.append((plan_id, commit))
+            return
+        self.file.write(json.dumps({"plan_id": plan_id, "commit": commit}) + '\n')
+        self.done[plan_id] = commit
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every:
+            self.sync()
+
+    def confirm(self, resolve=None):
+        """Write the held-back entries now that their commits are durable"""
+        pending, self.pending = self.pending, []
+        for plan_id, commit in pending:
+            self.record(plan_id, resolve(commit) if resolve else commit)
+        self.sync()
+
+    def discard(self):
+        """Drop held-back entries whose commits were never written"""
+        self.pending = []
+
+    def sync(self):
+        """Fsync the records written since the last sync"""
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    def close(self):
+        """Sync and close the journal file"""
+        self.sync()
+        self.file.close()
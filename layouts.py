@@ -0,0 +1,103 @@
+"""
+Repository Layouts
+Path allocation strategies that keep generated files out of huge flat directories
+"""
+
+import functools
+import posixpath
+import subprocess
+import zlib
+from collections import OrderedDict
+
+HASH_BUCKETS = 256
+
+
+@functools.lru_cache(maxsize=4096)
+def month_dir(day):
+    """YYYY/MM directory for a calendar day"""
+    return day.strftime('%Y/%m')
+
+
+def flat_layout(path, day):
+    """Keep the template path as is"""
+    return path
+
+
+def date_layout(path, day):
+    """Fan files out by month: src/feature_20250305.py -> src/2025/03/feature_20250305.py
+
+    Each month directory holds at most one file per commit type and day, so
+    every tree stays bounded no matter how long the history gets.
+    """
+    parent, name = posixpath.split(path)
+    return posixpath.join(parent, month_dir(day), name)
+
+
+def hashed_layout(path, day):
+    """Fan files out over 256 buckets: src/feature_20250305.py -> src/3f/feature_20250305.py
+
+    Buckets come from a CRC of the file name, so trees grow evenly at
+    1/256th of the flat rate regardless of how commits spread over dates.
+    """
+    parent, name = posixpath.split(path)
+    bucket = f"{zlib.crc32(name.encode()) % HASH_BUCKETS:02x}"
+    return posixpath.join(parent, bucket, name)
+
+
+LAYOUTS = {
+    "flat": flat_layout,
+    "date": date_layout,
+    "hashed": hashed_layout,
+}
+
+
+def get_layout(name):
+    """Return the path allocation function registered under name"""
+    if name not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {name} (choose from {', '.join(LAYOUTS)})")
+    return LAYOUTS[name]
+
+
+class RollingFilePool:
+    """Fixed pool of files rewritten in least-recently-used order
+
+    Called like a layout, but every commit lands on the pool file that was
+    written longest ago, so the tree never grows beyond `size` files and
+    each new blob is a small delta of the one it replaces. The pool is
+    stateful and must be called in commit order.
+    """
+
+    def __init__(self, size=64, directory="activity"):
+        if size < 1:
+            raise ValueError(f"Rolling pool size must be at least 1, got {size}")
+        self.size = size
+        self.directory = directory
+        self.order = OrderedDict((self.slot_path(slot), None) for slot in range(size))
+
+    def slot_path(self, slot):
+        """Path of one pool file"""
+        return posixpath.join(self.directory, f"log_{slot:03d}.md")
+
+    def load(self, repo_path):
+        """Order the pool by when each file was last written on HEAD"""
+        process = subprocess.Popen(
+            ['git', 'log', '--format=', '--name-only', 'HEAD', '--', self.directory],
+            cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        recent = []
+        for line in process.stdout:
+            path = line.strip()
+            if path in self.order and path not in recent:
+                recent.append(path)
+                if len(recent) == self.size:
+                    break
+        process.kill()
+        process.wait()
+        # Never-written files come first, then the written ones oldest first
+        for path in reversed(recent):
+            self.order.move_to_end(path)
+
+    def __call__(self, path, day):
+        """Take the least recently used pool file for the next commit"""
+        slot, _ = self.order.popitem(last=False)
+        self.order[slot] = None
+        return slot
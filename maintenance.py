@@ -0,0 +1,118 @@
+"""
+Repository Maintenance
+Commit-graph and reachability bitmaps written once a backfill has added enough commits
+"""
+
+import os
+import json
+import time
+import subprocess
+
+from git_backend import git_dir, head_commit, run_git
+
+STATE_NAME = "backfill_maintenance.json"
+# New commits since the last maintenance before another one is worth its repack
+DEFAULT_THRESHOLD = 1000
+# Every benchmark command runs this many times and the fastest run counts
+BENCHMARK_RUNS = 3
+BENCHMARKS = {
+    "git log": ['log', '--oneline', 'HEAD'],
+    "rev-list --count": ['rev-list', '--count', 'HEAD'],
+}
+
+
+class RepositoryMaintenance:
+    """Repacks with reachability bitmaps and writes an incremental commit-graph
+
+    Thousands of backfilled commits leave many packs (or loose objects) and
+    no commit-graph, so every later git log, rev-list and push parses each
+    commit object again. The HEAD maintained last is kept in the git
+    directory; commits added since count towards the threshold, and the
+    history-walking commands are timed before and after to report the gain.
+    """
+
+    def __init__(self, repo_path, threshold=DEFAULT_THRESHOLD):
+        self.repo_path = repo_path
+        self.threshold = threshold
+        self.pending = 0
+        self.ran = False
+        self.duration = 0.0
+        self.before = {}
+        self.after = {}
+
+    def state_path(self):
+        """Where the last maintained HEAD is kept"""
+        return os.path.join(git_dir(self.repo_path), STATE_NAME)
+
+    def last_head(self):
+        """HEAD at the last maintenance, or None"""
+        try:
+            with open(self.state_path(), encoding='utf-8') as f:
+                return json.load(f).get("head")
+        except (OSError, ValueError):
+            return None
+
+    def count_new_commits(self, head):
+        """Commits reachable from head but not from the last maintained HEAD"""
+        last = self.last_head()
+        if last:
+            try:
+                return int(run_git(self.repo_path, 'rev-list', '--count', head, f'^{last}'))
+            except subprocess.CalledProcessError:
+                # The old HEAD was pruned or never existed here: count everything
+                pass
+        return int(run_git(self.repo_path, 'rev-list', '--count', head))
+
+    def benchmark(self):
+        """Fastest wall time in seconds of each history-walking command"""
+        timings = {}
+        for name, args in BENCHMARKS.items():
+            best = None
+            for _ in range(BENCHMARK_RUNS):
+                start = time.perf_counter()
+                run_git(self.repo_path, *args)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+        return timings
+
+    def run(self, force=False):
+        """Maintain the repository if enough new commits piled up, returning whether it did"""
+        head = head_commit(self.repo_path)
+        if head is None:
+            return False
+        self.pending = self.count_new_commits(head)
+        if not force and self.pending < self.threshold:
+            return False
+
+        self.before = self.benchmark()
+        start = time.perf_counter()
+        # One pack with a bitmap: pushes and counts read reachability from the bitmap
+        run_git(self.repo_path, 'repack', '-a', '-d', '-q', '--write-bitmap-index')
+        # --split only writes a new layer for commits the existing graph lacks
+        run_git(self.repo_path, 'commit-graph', 'write', '--reachable', '--split')
+        self.duration = time.perf_counter() - start
+        self.after = self.benchmark()
+        self.ran = True
+
+        path = self.state_path()
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"head": head, "commits": self.pending, "time": time.time()}, f)
+        os.replace(temp_path, path)
+        return True
+
+    def speedups(self):
+        """{command: (seconds before, seconds after)} of the last run"""
+        return {name: (self.before[name], self.after[name]) for name in self.before}
+
+    def summary(self):
+        """Lines describing what the last run did"""
+        if not self.ran:
+            return [f"{self.pending}/{self.threshold} new commits, skipped"]
+        lines = [f"{self.pending} new commits, repacked with bitmaps and wrote commit-graph "
+                 f"in {self.duration:.2f}s"]
+        for name, (before, after) in self.speedups().items():
+            factor = before / after if after else float('inf')
+            lines.append(f"{name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({factor:.1f}x)")
+        return lines
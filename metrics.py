@@ -0,0 +1,201 @@
+"""
+Backfill Metrics
+Prometheus text-format metrics for bot runs, written for the node-exporter
+textfile collector and optionally served on a local port
+"""
+
+import os
+import time
+import threading
+
+# Commit latency buckets in seconds (upper bounds, +Inf is implied)
+COMMIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def escape_label(value):
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    """Render a label dict as {a="1",b="2"}"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+class BackfillMetrics:
+    """Counters, gauges and histograms of one backfill run
+
+    With a path, the exposition file is rewritten atomically at most every
+    `interval` seconds while commits are made (name it *.prom inside the
+    textfile collector directory). With a port, the same text is served on
+    http://127.0.0.1:<port>/metrics. With neither, every method returns
+    immediately.
+    """
+
+    def __init__(self, path=None, port=None, interval=15, labels=None):
+        self.path = path
+        self.port = port
+        self.enabled = bool(path or port)
+        self.interval = interval
+        self.labels = labels or {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.last_write = 0.0
+        self.created = 0
+        self.failed = 0
+        self.latency_counts = [0] * (len(COMMIT_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.pushes = {"ok": 0, "failed": 0}
+        self.push_seconds = 0.0
+        self.push_bytes = 0
+        self.planned = 0
+        self.processed = 0
+        self.running = 0
+        self.started = None
+
+    def start(self, planned):
+        """Begin a run of `planned` commits and start serving if a port was given"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.planned = planned
+            self.processed = 0
+            self.running = 1
+            self.started = time.time()
+        if self.port and self.server is None:
+            self.serve()
+        self.write()
+
+    def observe_commit(self, created, seconds):
+        """Count one commit attempt and its latency"""
+        if not self.enabled:
+            return
+        with self.lock:
+            if created:
+                self.created += 1
+            else:
+                self.failed += 1
+            self.processed += 1
+            self.latency_sum += seconds
+            for i, bound in enumerate(COMMIT_BUCKETS):
+                if seconds <= bound:
+                    self.latency_counts[i] += 1
+                    break
+            else:
+                self.latency_counts[-1] += 1
+        if time.monotonic() - self.last_write >= self.interval:
+            self.write()
+
+    def observe_push(self, ok, seconds, pack_bytes):
+        """Count one push with its duration and pack size"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.pushes["ok" if ok else "failed"] += 1
+            self.push_seconds += seconds
+            self.push_bytes += pack_bytes
+        self.write()
+
+    def finish(self):
+        """Mark the run as done (plan entries skipped on resume count as processed)"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.processed = max(self.processed, self.planned)
+            self.running = 0
+        self.write()
+
+    def render(self):
+        """The current metrics in Prometheus text exposition format"""
+        labels = format_labels(self.labels)
+
+        def with_label(key, value):
+            return format_labels(dict(self.labels, **{key: value}))
+
+        with self.lock:
+            lines = [
+                "# HELP backfill_commits_created_total Backfill commits created.",
+                "# TYPE backfill_commits_created_total counter",
+                f"backfill_commits_created_total{labels} {self.created}",
+                "# HELP backfill_commits_failed_total Backfill commit attempts that created nothing.",
+                "# TYPE backfill_commits_failed_total counter",
+                f"backfill_commits_failed_total{labels} {self.failed}",
+                "# HELP backfill_commit_duration_seconds Time to create one backfill commit.",
+                "# TYPE backfill_commit_duration_seconds histogram",
+            ]
+            cumulative = 0
+            for bound, count in zip(COMMIT_BUCKETS + ("+Inf",), self.latency_counts):
+                cumulative += count
+                lines.append(f"backfill_commit_duration_seconds_bucket{with_label('le', bound)} {cumulative}")
+            lines += [
+                f"backfill_commit_duration_seconds_sum{labels} {self.latency_sum:.6f}",
+                f"backfill_commit_duration_seconds_count{labels} {cumulative}",
+                "# HELP backfill_pushes_total Pushes to the remote by result.",
+                "# TYPE backfill_pushes_total counter",
+                f"backfill_pushes_total{with_label('result', 'ok')} {self.pushes['ok']}",
+                f"backfill_pushes_total{with_label('result', 'failed')} {self.pushes['failed']}",
+                "# HELP backfill_push_duration_seconds Time spent pushing.",
+                "# TYPE backfill_push_duration_seconds summary",
+                f"backfill_push_duration_seconds_sum{labels} {self.push_seconds:.6f}",
+                f"backfill_push_duration_seconds_count{labels} {sum(self.pushes.values())}",
+                "# HELP backfill_push_bytes_total Pack bytes sent by pushes.",
+                "# TYPE backfill_push_bytes_total counter",
+                f"backfill_push_bytes_total{labels} {self.push_bytes}",
+                "# HELP backfill_plan_commits Commits in the current plan.",
+                "# TYPE backfill_plan_commits gauge",
+                f"backfill_plan_commits{labels} {self.planned}",
+                "# HELP backfill_plan_processed_commits Plan entries processed so far.",
+                "# TYPE backfill_plan_processed_commits gauge",
+                f"backfill_plan_processed_commits{labels} {self.processed}",
+                "# HELP backfill_progress_ratio Fraction of the plan processed.",
+                "# TYPE backfill_progress_ratio gauge",
+                f"backfill_progress_ratio{labels} {self.processed / self.planned if self.planned else 0:.6f}",
+                "# HELP backfill_running Whether a backfill run is in progress.",
+                "# TYPE backfill_running gauge",
+                f"backfill_running{labels} {self.running}",
+                "# HELP backfill_start_time_seconds Unix time the current run started.",
+                "# TYPE backfill_start_time_seconds gauge",
+                f"backfill_start_time_seconds{labels} {self.started or 0:.0f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Atomically replace the exposition file so scrapers never see half of it"""
+        self.last_write = time.monotonic()
+        if not self.path:
+            return
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(temp_path, self.path)
+
+    def serve(self):
+        """Serve /metrics on 127.0.0.1:port from a daemon thread"""
+        # Imported here so runs without a port never load the HTTP stack
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        """Stop serving"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
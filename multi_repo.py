@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Multi-Repository Backfill Runner
+Runs backfills for every repository listed in a manifest across a process pool
+
+The manifest is a JSON file: either a list of repository entries, or an
+object with "defaults" (applied to every entry) and "repos". An entry is a
+path string or an object such as
+
+    {"repo": "/path/to/repo", "mode": "year", "commits_per_day": 3,
+     "backend": "pack", "seed": 7, "push": false}
+
+mode is "days" (backfill_past_days, with "days_back") or "year"
+(backfill_entire_year). Any other keys are passed to the bot constructor.
+Every repository logs to bot.log / bot_error.log in its own git directory;
+a "log_dir" in the manifest gets one subdirectory per repository instead,
+so no two worker processes rotate the same files.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+RUN_KEYS = ("repo", "mode", "days_back", "commits_per_day")
+
+
+def load_manifest(path):
+    """Read a manifest and return one fully-resolved entry per repository"""
+    with open(path) as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"repos": manifest}
+    defaults = manifest.get("defaults", {})
+
+    entries = []
+    for repo in manifest["repos"]:
+        entry = {"mode": "days", "days_back": 30, "commits_per_day": 2}
+        entry.update(defaults)
+        entry.update({"repo": repo} if isinstance(repo, str) else repo)
+        entry["repo"] = os.path.abspath(os.path.expanduser(entry["repo"]))
+        if entry.get("log_dir"):
+            entry["log_dir"] = os.path.join(os.path.expanduser(entry["log_dir"]),
+                                            os.path.basename(entry["repo"]))
+        entries.append(entry)
+
+    log_dirs = [entry["log_dir"] for entry in entries if entry.get("log_dir")]
+    if len(set(log_dirs)) != len(log_dirs):
+        raise ValueError("repositories with the same name cannot share a log_dir")
+    return entries
+
+
+def run_entry(entry):
+    """Worker: run one repository's backfill and return its result and timing"""
+    options = {key: value for key, value in entry.items() if key not in RUN_KEYS}
+    output = io.StringIO()
+    start = time.perf_counter()
+    result = {"repo": entry["repo"], "mode": entry["mode"], "ok": False}
+    try:
+        # Each repository's progress lines are kept apart instead of interleaving
+        with contextlib.redirect_stdout(output):
+            if entry["mode"] == "year":
+                from year_backfill import YearBackfillBot
+                bot = YearBackfillBot(repo_path=entry["repo"], **options)
+                counts = bot.backfill_entire_year(entry["commits_per_day"])
+            else:
+                from backfill_bot import GitHubBackfillBot
+                bot = GitHubBackfillBot(repo_path=entry["repo"], **options)
+                counts = bot.backfill_past_days(entry["days_back"], entry["commits_per_day"])
+        result.update(counts)
+        result["ok"] = counts["written"]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["output"] = output.getvalue()
+    return result
+
+
+def run_manifest(entries, workers=None):
+    """Backfill every entry on a bounded process pool, returning results in manifest order"""
+    workers = min(workers or os.cpu_count() or 1, len(entries)) or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_entry, entry): i for i, entry in enumerate(entries)}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = "✅" if result["ok"] else "❌"
+            print(f"{status} {result['repo']}: {result.get('created', 0)} commits "
+                  f"in {result['seconds']:.1f}s")
+    return [results[i] for i in range(len(entries))]
+
+
+def summarize(results, wall_seconds):
+    """Aggregate per-repository results into one summary"""
+    return {
+        "repos": len(results),
+        "succeeded": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "commits": sum(result.get("created", 0) for result in results),
+        "wall_seconds": round(wall_seconds, 3),
+        "repo_seconds": round(sum(result["seconds"] for result in results), 3),
+        "results": results,
+    }
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Backfill many repositories from a manifest")
+    parser.add_argument("manifest", help="JSON manifest listing the repositories")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel repositories (default: CPU count)")
+    parser.add_argument("--summary", help="write the JSON summary to this file")
+    args = parser.parse_args()
+
+    entries = load_manifest(args.manifest)
+    print(f"🔄 Backfilling {len(entries)} repositories")
+    print("=" * 60)
+    start = time.perf_counter()
+    summary = summarize(run_manifest(entries, args.workers), time.perf_counter() - start)
+
+    print("=" * 60)
+    print(f"🎉 {summary['succeeded']}/{summary['repos']} repositories, "
+          f"{summary['commits']} commits in {summary['wall_seconds']:.1f}s "
+          f"({summary['repo_seconds']:.1f}s of per-repo work)")
+    for result in summary["results"]:
+        if not result["ok"]:
+            print(f"❌ {result['repo']}: {result.get('error', 'commit backend failed')}")
+
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"📄 Summary written to {args.summary}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Packfile Writer
+Builds a batch of git objects in memory and writes them as one .pack + .idx
+"""
+
+import os
+import zlib
+import struct
+import hashlib
+import binascii
+
+OBJECT_TYPES = {"commit": 1, "tree": 2, "blob": 3}
+OBJ_OFS_DELTA = 6
+
+# Same default as git's pack.depth, keeps reads of the newest objects cheap
+MAX_DELTA_DEPTH = 50
+
+
+def object_id(kind, data):
+    """Return the SHA-1 object id of a loose object"""
+    return hashlib.sha1(f"{kind} {len(data)}\0".encode('ascii') + data).hexdigest()
+
+
+def serialize_tree(entries):
+    """Serialize {name: (mode, type, oid)} into a git tree object body"""
+    def sort_key(name):
+        # Git orders directories as if their name ended with a slash
+        return name.encode('utf-8') + (b'/' if entries[name][1] == 'tree' else b'')
+
+    body = []
+    for name in sorted(entries, key=sort_key):
+        mode, kind, oid = entries[name]
+        body.append(f"{mode.lstrip('0')} {name}\0".encode('utf-8') + bytes.fromhex(oid))
+    return b''.join(body)
+
+
+def parse_tree(data):
+    """Parse a git tree object body into {name: (mode, type, oid)} as git ls-tree lists it"""
+    entries = {}
+    position = 0
+    while position < len(data):
+        space = data.index(b' ', position)
+        nul = data.index(b'\0', space)
+        mode = data[position:space].decode('ascii').zfill(6)
+        kind = 'tree' if mode == '040000' else 'commit' if mode == '160000' else 'blob'
+        entries[data[space + 1:nul].decode('utf-8')] = (mode, kind, data[nul + 1:nul + 21].hex())
+        position = nul + 21
+    return entries
+
+
+def serialize_commit(tree, parents, author, committer, message):
+    """Serialize a commit object body; author/committer include the raw date"""
+    lines = [f"tree {tree}"]
+    lines += [f"parent {parent}" for parent in parents]
+    lines += [f"author {author}", f"committer {committer}", "", message]
+    return '\n'.join(lines).encode('utf-8')
+
+
+def encode_size(size):
+    """Encode a size as the little-endian base-128 varint used in deltas"""
+    out = bytearray()
+    while True:
+        byte = size & 0x7f
+        size >>= 7
+        if size:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def copy_op(offset, size):
+    """Encode a delta instruction copying size bytes from offset in the base"""
+    cmd = 0x80
+    args = bytearray()
+    for i in range(4):
+        byte = (offset >> (8 * i)) & 0xff
+        if byte:
+            cmd |= 1 << i
+            args.append(byte)
+    for i in range(3):
+        byte = (size >> (8 * i)) & 0xff
+        if byte:
+            cmd |= 0x10 << i
+            args.append(byte)
+    return bytes([cmd]) + bytes(args)
+
+
+def common_prefix(a, b):
+    """Length of the common prefix of two byte strings (bisection over slices)"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(a, b, limit):
+    """Length of the common suffix of two byte strings, at most limit"""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def make_delta(base, target):
+    """Build a git delta turning base into target
+
+    Backfill content differs from the previous version of the same template
+    only in a few bytes (the date), so copying the common prefix and suffix
+    and inserting the middle is enough.
+    """
+    prefix = common_prefix(base, target)
+    suffix = common_suffix(base, target, min(len(base), len(target)) - prefix)
+
+    ops = [encode_size(len(base)), encode_size(len(target))]
+    for start in range(0, prefix, 0xffffff):
+        ops.append(copy_op(start, min(0xffffff, prefix - start)))
+    middle = target[prefix:len(target) - suffix]
+    for start in range(0, len(middle), 0x7f):
+        chunk = middle[start:start + 0x7f]
+        ops.append(bytes([len(chunk)]) + chunk)
+    for start in range(0, suffix, 0xffffff):
+        ops.append(copy_op(len(base) - suffix + start, min(0xffffff, suffix - start)))
+    return b''.join(ops)
+
+
+def entry_header(type_number, size):
+    """Encode the type and inflated size header of a pack entry"""
+    out = bytearray()
+    byte = (type_number << 4) | (size & 0x0f)
+    size >>= 4
+    while size:
+        out.append(byte | 0x80)
+        byte = size & 0x7f
+        size >>= 7
+    out.append(byte)
+    return bytes(out)
+
+
+def encode_offset(offset):
+    """Encode the relative base offset of an OFS_DELTA entry"""
+    out = [offset & 0x7f]
+    offset >>= 7
+    while offset:
+        offset -= 1
+        out.insert(0, 0x80 | (offset & 0x7f))
+        offset >>= 7
+    return bytes(out)
+
+
+def pack_index(oids, offsets, crcs, pack_sha):
+    """Build the version 2 .idx of a pack from each object's id, offset and entry CRC-32
+
+    Offsets from 2 GiB on go into the 64-bit offset table.
+    """
+    order = sorted(range(len(oids)), key=lambda i: oids[i])
+    shas = [bytes.fromhex(oids[i]) for i in order]
+    fanout = [0] * 256
+    for sha in shas:
+        fanout[sha[0]] += 1
+    for i in range(1, 256):
+        fanout[i] += fanout[i - 1]
+
+    small_offsets = []
+    large_offsets = []
+    for i in order:
+        if offsets[i] < 0x80000000:
+            small_offsets.append(struct.pack('>I', offsets[i]))
+        else:
+            small_offsets.append(struct.pack('>I', 0x80000000 | len(large_offsets)))
+            large_offsets.append(struct.pack('>Q', offsets[i]))
+
+    idx = b''.join([
+        b'\xfftOc', struct.pack('>I', 2),
+        struct.pack('>256I', *fanout),
+        b''.join(shas),
+        b''.join(struct.pack('>I', crcs[i]) for i in order),
+        b''.join(small_offsets),
+        b''.join(large_offsets),
+        pack_sha,
+    ])
+    return idx + hashlib.sha1(idx).digest()
+
+
+class PackWriter:
+    """Collect git objects as ready-to-write pack entries and write them out as a single pack
+
+    An entry's offset in the pack is known when it is added, so each object
+    is compressed (and deltified) right away and only its entry bytes are
+    kept. Raw data is only held for the newest object of each delta key,
+    the one the next object under that key is deltified against.
+    """
+
+    def __init__(self):
+        self.objects = []  # [oid, entry, crc32]
+        self.positions = {}
+        self.offsets = []
+        self.depths = []
+        self.latest = {}  # delta key -> (position, data)
+        self.size = len(b'PACK') + 8
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __contains__(self, oid):
+        return oid in self.positions
+
+    def add(self, kind, data, delta_key=None):
+        """Add an object and return its id
+
+        Objects sharing a delta_key are stored as deltas against the
+        previous object added under that key.
+        """
+        oid = object_id(kind, data)
+        if oid in self.positions:
+            return oid
+
+        entry = None
+        depth = 0
+        if delta_key is not None and delta_key in self.latest:
+            base, base_data = self.latest[delta_key]
+            if self.depths[base] < MAX_DELTA_DEPTH:
+                delta = make_delta(base_data, data)
+                if len(delta) < len(data) // 2:
+                    entry = (entry_header(OBJ_OFS_DELTA, len(delta))
+                             + encode_offset(self.size - self.offsets[base])
+                             + zlib.compress(delta))
+                    depth = self.depths[base] + 1
+        if entry is None:
+            entry = entry_header(OBJECT_TYPES[kind], len(data)) + zlib.compress(data)
+
+        position = len(self.objects)
+        self.objects.append([oid, entry, binascii.crc32(entry) & 0xffffffff])
+        self.positions[oid] = position
+        self.offsets.append(self.size)
+        self.depths.append(depth)
+        self.size += len(entry)
+        if delta_key is not None:
+            # The previous base is no longer needed, only its entry stays
+            self.latest[delta_key] = (position, data)
+        return oid
+
+    def write(self, pack_dir):
+        """Write pack-<sha>.pack and its .idx into pack_dir, returning the pack sha"""
+        os.makedirs(pack_dir, exist_ok=True)
+        digest = hashlib.sha1()
+        tmp_pack = os.path.join(pack_dir, f"tmp_pack_{os.getpid()}")
+        with open(tmp_pack, 'wb') as f:
+            header = b'PACK' + struct.pack('>II', 2, len(self.objects))
+            f.write(header)
+            digest.update(header)
+            for _, entry, _ in self.objects:
+                f.write(entry)
+                digest.update(entry)
+            pack_sha = digest.digest()
+            f.write(pack_sha)
+
+        idx = pack_index([oid for oid, _, _ in self.objects], self.offsets,
+                         [crc for _, _, crc in self.objects], pack_sha)
+
+        name = pack_sha.hex()
+        tmp_idx = os.path.join(pack_dir, f"tmp_idx_{os.getpid()}")
+        with open(tmp_idx, 'wb') as f:
+            f.write(idx)
+        # The .idx makes the pack visible, so it is renamed into place last
+        os.replace(tmp_pack, os.path.join(pack_dir, f"pack-{name}.pack"))
+        os.replace(tmp_idx, os.path.join(pack_dir, f"pack-{name}.idx"))
+        return name
@@ -0,0 +1,124 @@
+"""
+Render Pipeline
+Renders commit payloads on a thread pool ahead of the single git writer
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+class RenderPipeline:
+    """Producer/consumer pipeline between content rendering and git writes
+
+    A producer thread walks the items in order and submits render(item) to
+    a pool of `workers` threads; the futures go into a queue bounded at
+    `depth`, so rendering never runs more than `depth` commits ahead.
+    run() yields (item, payload) in the original order and the caller's
+    loop body is the single writer stage. With workers=0 everything runs
+    inline in the caller's thread.
+    """
+
+    def __init__(self, render, workers=0, depth=64):
+        self.render = render
+        self.workers = workers
+        self.depth = depth
+        self.items = 0
+        self.render_seconds = 0.0
+        self.write_seconds = 0.0
+        self.producer_blocked_seconds = 0.0
+        self.writer_waiting_seconds = 0.0
+        self.max_queued = 0
+        self.lock = threading.Lock()
+
+    def timed_render(self, item):
+        """Render one item and account the time to the render stage"""
+        start = time.perf_counter()
+        payload = self.render(item)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.render_seconds += elapsed
+        return payload
+
+    def run(self, items):
+        """Yield (item, payload) pairs in order while rendering runs ahead"""
+        if self.workers <= 0:
+            for item in items:
+                payload = self.timed_render(item)
+                yield from self._hand_over(item, payload)
+            return
+
+        pending = queue.Queue(maxsize=self.depth)
+        stopped = threading.Event()
+
+        def put(entry):
+            start = time.perf_counter()
+            while not stopped.is_set():
+                try:
+                    pending.put(entry, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            # Render workers update the counters under the same lock
+            with self.lock:
+                self.producer_blocked_seconds += time.perf_counter() - start
+                self.max_queued = max(self.max_queued, pending.qsize())
+
+        def produce(executor):
+            try:
+                for item in items:
+                    if stopped.is_set():
+                        break
+                    put((item, executor.submit(self.timed_render, item)))
+            except Exception as e:
+                put((_DONE, e))
+            put((_DONE, None))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            producer = threading.Thread(target=produce, args=(executor,), daemon=True)
+            producer.start()
+            try:
+                while True:
+                    start = time.perf_counter()
+                    item, future = pending.get()
+                    if item is _DONE:
+                        self.writer_waiting_seconds += time.perf_counter() - start
+                        if future is not None:
+                            raise future
+                        break
+                    payload = future.result()
+                    self.writer_waiting_seconds += time.perf_counter() - start
+                    yield from self._hand_over(item, payload)
+            finally:
+                stopped.set()
+                producer.join()
+
+    def _hand_over(self, item, payload):
+        """Yield to the writer and account the time it takes to the write stage"""
+        start = time.perf_counter()
+        yield item, payload
+        self.write_seconds += time.perf_counter() - start
+        self.items += 1
+
+    def stats(self):
+        """Per-stage timing and backpressure counters"""
+        return {
+            "items": self.items,
+            "workers": self.workers,
+            "depth": self.depth,
+            "render_seconds": self.render_seconds,
+            "write_seconds": self.write_seconds,
+            "producer_blocked_seconds": self.producer_blocked_seconds,
+            "writer_waiting_seconds": self.writer_waiting_seconds,
+            "max_queued": self.max_queued,
+        }
+
+    def summary(self):
+        """One-line description of where the pipeline spent its time"""
+        return (f"{self.items} commits, render {self.render_seconds:.2f}s on "
+                f"{self.workers} workers, write {self.write_seconds:.2f}s, "
+                f"backpressure {self.producer_blocked_seconds:.2f}s, "
+                f"writer idle {self.writer_waiting_seconds:.2f}s, max queued {self.max_queued}")
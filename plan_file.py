@@ -0,0 +1,113 @@
+"""
+Plan Files
+Compiled commit plans streamed to and from disk, one compact JSON array per commit
+"""
+
+import os
+import gzip
+import json
+import datetime
+
+PLAN_FORMAT = "backfill-plan"
+PLAN_VERSION = 1
+# Order of the values in each record line
+FIELDS = ("plan_id", "timestamp", "type", "path", "message", "hash")
+
+
+def open_plan_file(path, mode):
+    """Open a plan file as text, gzip-compressed when the name ends in .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class PlanWriter:
+    """Writes a JSON header line, then one record line per planned commit
+
+    The header holds the number of commits so readers know the size of a
+    plan without scanning it. Records are written as they are produced, so
+    compiling never holds more than one rendered commit in memory.
+    """
+
+    def __init__(self, path, commits, **header):
+        self.path = path
+        self.count = 0
+        self.file = open_plan_file(path, 'w')
+        header = dict(format=PLAN_FORMAT, version=PLAN_VERSION, commits=commits, fields=FIELDS, **header)
+        self.file.write(json.dumps(header) + '\n')
+
+    def write(self, plan_id, commit_datetime, commit_type, path, message, content_hash):
+        """Append one planned commit"""
+        record = [plan_id, commit_datetime.isoformat(timespec='minutes'), commit_type, path, message,
+                  content_hash]
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.count += 1
+
+    def close(self):
+        """Finish the file"""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class PlanReader:
+    """Streams the records of a plan file in commit order without loading it whole"""
+
+    def __init__(self, path):
+        self.path = path
+        with open_plan_file(path, 'r') as f:
+            try:
+                self.header = json.loads(f.readline())
+            except ValueError:
+                self.header = {}
+        if self.header.get("format") != PLAN_FORMAT:
+            raise ValueError(f"{path} is not a backfill plan file")
+        if self.header.get("version") != PLAN_VERSION:
+            raise ValueError(f"{path} is plan format version {self.header.get('version')}, "
+                             f"expected {PLAN_VERSION}")
+
+    def __len__(self):
+        return self.header["commits"]
+
+    def __iter__(self):
+        """Yield (plan_id, datetime, type, path, message, content hash) per commit"""
+        with open_plan_file(self.path, 'r') as f:
+            f.readline()
+            for line in f:
+                plan_id, timestamp, commit_type, path, message, content_hash = json.loads(line)
+                yield (plan_id, datetime.datetime.fromisoformat(timestamp), commit_type, path,
+                       message, content_hash)
+
+
+def part_path(path, part, parts):
+    """plan.jsonl.gz -> plan.part2of4.jsonl.gz"""
+    stem, compressed = (path[:-3], '.gz') if path.endswith('.gz') else (path, '')
+    stem, extension = os.path.splitext(stem)
+    return f"{stem}.part{part}of{parts}{extension}{compressed}"
+
+
+def split_plan(path, parts):
+    """Split a plan file into contiguous parts that can be executed separately
+
+    Each part keeps the header of the original (with its own commit count),
+    so parts replay in order, or on different workers, exactly as the whole
+    plan would. Returns the paths of the part files.
+    """
+    reader = PlanReader(path)
+    header = {key: value for key, value in reader.header.items()
+              if key not in ("format", "version", "commits", "fields", "part")}
+    size, extra = divmod(len(reader), parts)
+    records = iter(reader)
+    paths = []
+    for part in range(parts):
+        count = size + (1 if part < extra else 0)
+        paths.append(part_path(path, part + 1, parts))
+        with PlanWriter(paths[-1], count, part=[part + 1, parts], **header) as writer:
+            for _ in range(count):
+                writer.write(*next(records))
+    return paths
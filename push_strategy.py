@@ -0,0 +1,143 @@
+"""
+Push Strategy
+Pushes long backfilled histories in resumable batches
+"""
+
+import re
+import time
+import subprocess
+
+from git_backend import run_git
+
+UNITS = {"bytes": 1, "byte": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+WRITING_OBJECTS = re.compile(r"Writing objects: 100% \((\d+)/\d+\), ([\d.]+) (bytes?|KiB|MiB|GiB)")
+
+
+def git_output(repo_path, *args, input=None):
+    """Run git and return stdout, or None if the command failed"""
+    try:
+        return run_git(repo_path, *args, input=input)
+    except subprocess.CalledProcessError:
+        return None
+
+
+class BatchedPusher:
+    """Push the commits between the remote branch and HEAD in batches
+
+    A batch ends every `every_commits` commits and/or every `every_bytes`
+    bytes (estimated from the on-disk size of the objects being pushed).
+    Each batch pushes an intermediate commit to the remote branch, so a
+    failure only loses that batch and the next run resumes from whatever
+    the remote already has. With neither limit set it is one plain push.
+    """
+
+    def __init__(self, repo_path, remote="origin", branch="main", every_commits=None,
+                 every_bytes=None, limiter=None, retries=2):
+        self.repo_path = repo_path
+        self.remote = remote
+        self.branch = branch
+        self.every_commits = every_commits
+        self.every_bytes = every_bytes
+        self.limiter = limiter
+        self.retries = retries
+        self.pushes = []
+
+    def remote_head(self):
+        """Commit the remote branch points at, if it exists and we have it locally"""
+        listing = git_output(self.repo_path, 'ls-remote', self.remote, f'refs/heads/{self.branch}')
+        if not listing:
+            return None
+        sha = listing.split()[0]
+        if git_output(self.repo_path, 'merge-base', '--is-ancestor', sha, 'HEAD') is None:
+            return None
+        return sha
+
+    def pending_commits(self, base):
+        """Commits still to push, oldest first"""
+        revisions = [f'{base}..HEAD'] if base else ['HEAD']
+        listing = git_output(self.repo_path, 'rev-list', '--reverse', '--first-parent', *revisions)
+        return listing.split() if listing else []
+
+    def estimate_bytes(self, base):
+        """On-disk size of the objects that are missing on the remote"""
+        revisions = [f'{base}..HEAD'] if base else ['HEAD']
+        objects = git_output(self.repo_path, 'rev-list', '--objects', '--no-object-names', *revisions)
+        if not objects:
+            return 0
+        sizes = git_output(self.repo_path, 'cat-file', '--batch-check=%(objectsize:disk)',
+                           input=objects + '\n')
+        return sum(int(size) for size in sizes.split()) if sizes else 0
+
+    def batch_size(self, base, commits):
+        """Number of commits per push given the configured limits"""
+        size = len(commits)
+        if self.every_commits:
+            size = min(size, self.every_commits)
+        if self.every_bytes and commits:
+            per_commit = max(1, self.estimate_bytes(base) // len(commits))
+            size = min(size, max(1, self.every_bytes // per_commit))
+        return max(1, size)
+
+    def push_commit(self, sha):
+        """Push one commit to the remote branch, returning (ok, pack bytes, error)"""
+        result = subprocess.run(
+            ['git', 'push', '--progress', self.remote, f'{sha}:refs/heads/{self.branch}'],
+            cwd=self.repo_path, capture_output=True, text=True)
+        pack_bytes = 0
+        match = None
+        for match in WRITING_OBJECTS.finditer(result.stderr):
+            pass
+        if match:
+            pack_bytes = int(float(match.group(2)) * UNITS[match.group(3)])
+        error = result.stderr.strip().splitlines()[-1] if result.returncode and result.stderr.strip() else None
+        return result.returncode == 0, pack_bytes, error
+
+    def push(self):
+        """Push everything not yet on the remote, returning True when HEAD is pushed"""
+        base = self.remote_head()
+        commits = self.pending_commits(base)
+        if not commits:
+            print("✅ Remote is already up to date")
+            return True
+        if base:
+            print(f"♻️  Remote already has {base[:7]}, {len(commits)} commits left to push")
+
+        size = self.batch_size(base, commits)
+        # (position, commit) of the last commit of each batch
+        positions = list(range(size - 1, len(commits), size))
+        if positions[-1] != len(commits) - 1:
+            positions.append(len(commits) - 1)
+        targets = [(position, commits[position]) for position in positions]
+
+        pushed = 0
+        for number, (position, sha) in enumerate(targets, 1):
+            count = position + 1 - pushed
+            for attempt in range(self.retries + 1):
+                # Waiting on the rate limiter is not part of the push's time
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                start = time.perf_counter()
+                ok, pack_bytes, error = self.push_commit(sha)
+                seconds = time.perf_counter() - start
+                self.pushes.append({"commit": sha, "commits": count, "bytes": pack_bytes,
+                                    "seconds": seconds, "ok": ok, "error": error})
+                if ok:
+                    break
+                print(f"⚠️  Push {number}/{len(targets)} failed (attempt {attempt + 1}): {error}")
+                if attempt < self.retries:
+                    time.sleep(2 ** attempt)
+            if not ok:
+                print(f"❌ Stopped after {pushed} commits; rerun to resume from {self.remote}/{self.branch}")
+                return False
+            pushed += count
+            print(f"🚀 Push {number}/{len(targets)}: {count} commits, "
+                  f"{pack_bytes / 1024:.1f} KiB in {seconds:.2f}s")
+        return True
+
+    def summary(self):
+        """One-line description of all pushes made"""
+        done = [push for push in self.pushes if push["ok"]]
+        total_bytes = sum(push["bytes"] for push in done)
+        total_seconds = sum(push["seconds"] for push in self.pushes)
+        return (f"{len(done)} pushes, {sum(push['commits'] for push in done)} commits, "
+                f"{total_bytes / 1024:.1f} KiB in {total_seconds:.2f}s")
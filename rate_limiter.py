@@ -0,0 +1,61 @@
+"""
+Rate Limiter
+Token-bucket pacing for commit creation and pushes
+"""
+
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` events per second with bursts of `burst`
+
+    A rate of None means unlimited: acquire() never sleeps but still counts
+    events, so the achieved rate can be reported either way.
+    """
+
+    def __init__(self, rate=None, burst=1, clock=time.monotonic, sleep=time.sleep):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive or None for unlimited")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.burst)
+        self.updated = None
+        self.started = None
+        self.events = 0
+        self.waited = 0.0
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` events are allowed, returning the time slept"""
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+            self.updated = now
+        self.events += tokens
+        if self.rate is None:
+            return 0.0
+
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= tokens
+        if self.tokens >= 0:
+            return 0.0
+
+        delay = -self.tokens / self.rate
+        self.sleep(delay)
+        self.waited += delay
+        return delay
+
+    def achieved_rate(self):
+        """Events per second since the first acquire()"""
+        if self.started is None:
+            return 0.0
+        elapsed = self.clock() - self.started
+        return self.events / elapsed if elapsed > 0 else float(self.events)
+
+    def summary(self):
+        """One-line description of the configured and achieved rate"""
+        limit = "unlimited" if self.rate is None else f"limit {self.rate:g}/s"
+        return (f"{self.events} events at {self.achieved_rate():.1f}/s "
+                f"({limit}, waited {self.waited:.1f}s)")
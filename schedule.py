@@ -0,0 +1,99 @@
+"""
+Commit Schedule
+Vectorized planning of commit timestamps for whole date ranges
+"""
+
+import datetime
+
+import numpy as np
+
+# One row per planned commit: 12 bytes each. slot numbers the commits of a
+# day and, with the day, identifies the commit in the checkpoint journal.
+SCHEDULE_DTYPE = np.dtype([
+    ("day", "datetime64[D]"),
+    ("hour", "u1"),
+    ("minute", "u1"),
+    ("slot", "u2"),
+])
+
+
+def weekdays(days):
+    """Monday=0 ... Sunday=6 for a datetime64[D] array (1970-01-01 was a Thursday)"""
+    return (days.astype(np.int64) + 3) % 7
+
+
+def build_schedule(start, end, commits_per_day=2, hours=(9, 22), skip_weekends=False,
+                   seed=None, descending=False, history=None, model=None, done=None):
+    """Plan every commit between start and end (inclusive) in a few array operations
+
+    commits_per_day is either a fixed count or a (low, high) range drawn per
+    day. Hours are drawn uniformly from the inclusive hours range. The same
+    seed always gives the same plan. With a HistoryIndex as history, the
+    per-day count is a target and only the missing commits are planned.
+    With an ActivityModel, which days get commits, how many and at what
+    hours are drawn from its histograms instead of commits_per_day and hours.
+
+    Slots are the day's target slots 0, 1, ... so a rerun plans the same
+    plan ids and the journal can skip the done ones. Topping up a day
+    from history instead gives the missing commits the lowest slots not
+    among the plan ids in done (the journal): the history says how many
+    are missing, and reusing a journaled id would skip them forever.
+    """
+    rng = np.random.default_rng(seed)
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    if skip_weekends:
+        days = days[weekdays(days) < 5]
+    if descending:
+        days = days[::-1]
+
+    if model is not None:
+        counts = model.sample_day_counts(rng, days)
+    elif isinstance(commits_per_day, (tuple, list)):
+        low, high = commits_per_day
+        counts = rng.integers(low, high + 1, size=len(days))
+    else:
+        counts = np.full(len(days), commits_per_day)
+
+    if history is not None:
+        counts = np.maximum(counts - history.counts_for(days), 0)
+
+    total = int(counts.sum())
+    plan = np.empty(total, dtype=SCHEDULE_DTYPE)
+    plan["day"] = np.repeat(days, counts)
+    if model is not None:
+        plan["hour"] = model.sample_hours(rng, total)
+    else:
+        plan["hour"] = rng.integers(hours[0], hours[1] + 1, size=total)
+    plan["minute"] = rng.integers(0, 60, size=total)
+    starts = np.cumsum(counts) - counts
+    plan["slot"] = np.arange(total) - np.repeat(starts, counts)
+    if history is not None and done:
+        taken = {}
+        for plan_id in done:
+            day, _, slot = plan_id.partition("#")
+            taken.setdefault(day, set()).add(int(slot))
+        # A dict lookup per planned day: np.isin would load numpy.ma just for this
+        for index in np.flatnonzero(counts > 0):
+            used = taken.get(str(days[index]))
+            if not used:
+                continue
+            free = [slot for slot in range(counts[index] + len(used)) if slot not in used]
+            plan["slot"][starts[index]:starts[index] + counts[index]] = free[:counts[index]]
+    return plan
+
+
+def iter_datetimes(plan):
+    """Yield the planned commits as naive datetimes"""
+    for day, hour, minute in zip(plan["day"].tolist(), plan["hour"].tolist(),
+                                 plan["minute"].tolist()):
+        yield datetime.datetime(day.year, day.month, day.day, hour, minute)
+
+
+def iter_plan(plan):
+    """Yield (datetime, slot, plan id) for every planned commit
+
+    Plan ids are "<day>#<slot>". They repeat across reruns of an unchanged
+    plan; when gap filling tops up a day they are new ids (see build_schedule).
+    """
+    for commit_datetime, slot in zip(iter_datetimes(plan), plan["slot"].tolist()):
+        yield commit_datetime, slot, f"{commit_datetime.date().isoformat()}#{slot}"
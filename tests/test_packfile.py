@@ -0,0 +1,93 @@
+"""
+Packfile Writer tests
+Packs written by PackWriter must read back through git's own pack tools
+"""
+
+import os
+import subprocess
+
+from packfile import (MAX_DELTA_DEPTH, PackWriter, object_id, pack_index, serialize_commit,
+                      serialize_tree)
+
+AUTHOR = "Backfill Bot <bot@example.com> 1735725600 +0000"
+
+
+def git(repo, *args, input=None):
+    """Run git in repo and return its stdout"""
+    return subprocess.run(['git'] + list(args), cwd=repo, input=input, check=True,
+                          capture_output=True).stdout
+
+
+def write_pack(tmp_path, writer):
+    """Write the pack into a fresh repository, returning (repo, .pack path, .idx path)"""
+    repo = str(tmp_path / "repo")
+    subprocess.run(['git', 'init', '-q', repo], check=True)
+    name = writer.write(os.path.join(repo, '.git', 'objects', 'pack'))
+    base = os.path.join(repo, '.git', 'objects', 'pack', f"pack-{name}")
+    return repo, base + '.pack', base + '.idx'
+
+
+def template(day):
+    """Content like a backfill template: the same text with a different date"""
+    return (f"# Daily notes\n\nDay: {day}\n\n" + "- steady progress\n" * 40).encode()
+
+
+def test_round_trip_with_deltas_and_empty_blob(tmp_path):
+    writer = PackWriter()
+    blobs = [writer.add('blob', template(day), delta_key='notes') for day in range(1, 11)]
+    empty = writer.add('blob', b'')
+    tree = writer.add('tree', serialize_tree({
+        'notes.md': ('100644', 'blob', blobs[-1]),
+        'empty.txt': ('100644', 'blob', empty),
+    }))
+    commit = writer.add('commit', serialize_commit(tree, [], AUTHOR, AUTHOR, "Add notes"))
+    assert empty == object_id('blob', b'') == 'e69de29bb2d1d6434b8b29ae775ad8c2e48c5391'
+    # Adding an object again does not add a second entry
+    assert writer.add('blob', b'') == empty and len(writer) == 13
+
+    repo, pack, idx = write_pack(tmp_path, writer)
+    git(repo, 'index-pack', '--verify', pack)
+    listing = git(repo, 'verify-pack', '-v', idx).decode()
+    # Every template version after the first is stored as a delta
+    assert "chain length = 1: 1 object" in listing
+    assert "chain length = 9: 1 object" in listing
+
+    for day, oid in enumerate(blobs, 1):
+        assert git(repo, 'cat-file', 'blob', oid) == template(day)
+    assert git(repo, 'cat-file', 'blob', empty) == b''
+    assert git(repo, 'cat-file', '-t', commit) == b'commit\n'
+    git(repo, 'fsck', '--strict', commit)
+
+
+def test_delta_chains_stop_at_max_depth(tmp_path):
+    writer = PackWriter()
+    for day in range(MAX_DELTA_DEPTH + 5):
+        writer.add('blob', template(day), delta_key='notes')
+
+    repo, pack, idx = write_pack(tmp_path, writer)
+    git(repo, 'index-pack', '--verify', pack)
+    listing = git(repo, 'verify-pack', '-v', idx).decode()
+    assert f"chain length = {MAX_DELTA_DEPTH}:" in listing
+    assert f"chain length = {MAX_DELTA_DEPTH + 1}:" not in listing
+
+
+def test_only_newest_object_of_a_delta_key_keeps_its_data():
+    writer = PackWriter()
+    for day in range(1, 11):
+        writer.add('blob', template(day), delta_key='notes')
+    writer.add('blob', b'no key')
+
+    assert list(writer.latest) == ['notes']
+    assert writer.latest['notes'] == (9, template(10))
+
+
+def test_index_encodes_large_offsets(tmp_path):
+    oids = [object_id('blob', str(number).encode()) for number in range(4)]
+    offsets = [12, 0x7fffffff, 0x80000000, 0x123456789]
+    crcs = [1, 2, 3, 4]
+    idx = tmp_path / "pack.idx"
+    idx.write_bytes(pack_index(oids, offsets, crcs, b'\0' * 20))
+
+    listing = git(str(tmp_path), 'show-index', input=idx.read_bytes()).decode().splitlines()
+    shown = {oid: int(offset) for offset, oid, _ in (line.split() for line in listing)}
+    assert shown == dict(zip(oids, offsets))
@@ -0,0 +1,141 @@
+"""
+Phase Timing
+Histograms of how long each phase of the commit path takes
+"""
+
+import json
+import math
+import time
+import threading
+import contextlib
+
+# Log-scale buckets, 20 per decade: percentiles are within ~6% of the true value
+BUCKETS_PER_DECADE = 20
+
+_DISABLED = contextlib.nullcontext()
+
+
+class Histogram:
+    """Count, total, max and log-bucketed distribution of durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        """Record one duration"""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        bucket = math.ceil(math.log10(seconds) * BUCKETS_PER_DECADE) if seconds > 0 else None
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    @staticmethod
+    def upper_bound(bucket):
+        """Largest duration that falls in a bucket"""
+        return 0.0 if bucket is None else 10 ** (bucket / BUCKETS_PER_DECADE)
+
+    def sorted_buckets(self):
+        """(upper bound, count) pairs, shortest durations first"""
+        return sorted((self.upper_bound(bucket), count) for bucket, count in self.buckets.items())
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in self.sorted_buckets():
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def stats(self):
+        """Summary numbers for this histogram"""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+
+class Phase:
+    """Context manager timing one run of a phase"""
+
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class PhaseTimer:
+    """Per-phase duration histograms, safe to share between threads
+
+    When disabled, phase() hands back one shared no-op context manager and
+    record() returns immediately, so leaving the hooks in costs next to
+    nothing.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def phase(self, name):
+        """Context manager that times its body as one sample of name"""
+        if not self.enabled:
+            return _DISABLED
+        return Phase(self, name)
+
+    def record(self, name, seconds):
+        """Add one sample to the named phase"""
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def stats(self):
+        """{phase: {count, total, p50, p95, max}} in the order phases first ran"""
+        with self.lock:
+            return {name: histogram.stats() for name, histogram in self.histograms.items()}
+
+    def summary(self):
+        """Table of every phase, one line each, durations in milliseconds"""
+        lines = [f"{'phase':<16}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, stats in self.stats().items():
+            lines.append(f"{name:<16}{stats['count']:>8}{stats['total']:>10.2f}"
+                         f"{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}"
+                         f"{stats['max'] * 1000:>10.2f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """Write the per-phase stats and bucket counts as JSON"""
+        with self.lock:
+            phases = {
+                name: dict(histogram.stats(),
+                           buckets=[[bound, count] for bound, count in histogram.sorted_buckets()])
+                for name, histogram in self.histograms.items()
+            }
+        with open(path, 'w') as f:
+            json.dump({"phases": phases}, f, indent=2)
+
+
+# Shared by every backend that was not handed a timer of its own
+NULL_TIMER = PhaseTimer(enabled=False)
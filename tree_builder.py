@@ -0,0 +1,73 @@
+"""
+Incremental Tree Builder
+In-memory tree model that only re-serializes directories that changed
+"""
+
+
+class TreeNode:
+    """One directory: its entries, loaded on first use, and its cached object id"""
+
+    def __init__(self, oid=None):
+        self.oid = oid
+        self.entries = None
+        self.children = {}
+
+
+class TreeBuilder:
+    """Track a root tree and rebuild only the path from a changed file to the root
+
+    read_tree(oid) must return {name: (mode, type, oid)} for an existing tree
+    and write_tree(path, entries) must store a tree and return its id. Each
+    existing tree is read at most once; untouched subtrees keep their cached
+    id and are never written again.
+    """
+
+    def __init__(self, root_oid, read_tree, write_tree):
+        self.root = TreeNode(root_oid)
+        self.read_tree = read_tree
+        self.write_tree = write_tree
+        self.trees_written = 0
+
+    def load(self, node):
+        """Make sure the entries of node are in memory"""
+        if node.entries is None:
+            node.entries = self.read_tree(node.oid) if node.oid else {}
+        return node.entries
+
+    def set_file(self, path, blob, mode='100644'):
+        """Point path at blob, returning False if it already holds that blob"""
+        parts = path.split('/')
+        nodes = [self.root]
+        node = self.root
+        for name in parts[:-1]:
+            entries = self.load(node)
+            child = node.children.get(name)
+            if child is None:
+                current = entries.get(name)
+                child = TreeNode(current[2] if current and current[1] == 'tree' else None)
+                node.children[name] = child
+            node = child
+            nodes.append(node)
+
+        entries = self.load(node)
+        if entries.get(parts[-1]) == (mode, 'blob', blob):
+            return False
+        entries[parts[-1]] = (mode, 'blob', blob)
+        # Everything from the file up to the root needs a new tree object
+        for node in nodes:
+            node.oid = None
+        return True
+
+    def write(self):
+        """Write the changed trees, deepest first, and return the root tree id"""
+        return self._write(self.root, '')
+
+    def _write(self, node, prefix):
+        if node.oid is not None:
+            return node.oid
+        entries = self.load(node)
+        for name, child in node.children.items():
+            entries[name] = ('040000', 'tree', self._write(child, prefix + name + '/'))
+        node.oid = self.write_tree(prefix, entries)
+        self.trees_written += 1
+        return node.oid